@@ -0,0 +1,118 @@
+"""In-memory stand-ins for Redis and Postgres that count round trips."""
+import asyncio
+import re
+import types
+from typing import Any
+from typing import Dict
+from typing import List
+
+from obsidion.core.settings_cache import AccountManager
+from obsidion.core.settings_cache import GuildManager
+from obsidion.core.settings_cache import I18nManager
+from obsidion.core.settings_cache import PrefixManager
+
+
+class FakeRedis:
+    """The subset of ``aioredis.Redis`` used by the bot, counting round trips."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.data: Dict[str, Any] = {}
+        self.latency = latency
+        self.round_trips = 0
+
+    # Every awaited command is one round trip, pipelines are counted once.
+    async def _call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        self.round_trips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return getattr(self, f"_{name}")(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._call(name, *args, **kwargs)
+
+    def pipeline(self) -> "FakePipeline":
+        return FakePipeline(self)
+
+    multi_exec = pipeline
+
+    def _exists(self, key: str) -> int:
+        return int(key in self.data)
+
+    def _get(self, key: str) -> Any:
+        value = self.data.get(key)
+        return value.encode() if isinstance(value, str) else value
+
+    def _set(self, key: str, value: Any, **_: Any) -> bool:
+        self.data[key] = value
+        return True
+
+    def _expire(self, key: str, ttl: int) -> int:
+        return int(key in self.data)
+
+    def _delete(self, *keys: str) -> int:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def _hgetall(self, key: str, encoding: str = None) -> Dict[str, str]:
+        return dict(self.data.get(key, {}))
+
+    def _hmset_dict(self, key: str, mapping: Dict[str, str]) -> bool:
+        self.data.setdefault(key, {}).update(mapping)
+        return True
+
+    def _publish(self, channel: str, message: str) -> int:
+        return 0
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis) -> None:
+        self._redis = redis
+        self._calls: List[Any] = []
+
+    def __getattr__(self, name: str) -> Any:
+        method = getattr(self._redis, f"_{name}")
+        return lambda *args, **kwargs: self._calls.append((method, args, kwargs))
+
+    async def execute(self) -> List[Any]:
+        self._redis.round_trips += 1
+        if self._redis.latency:
+            await asyncio.sleep(self._redis.latency)
+        return [method(*args, **kwargs) for method, args, kwargs in self._calls]
+
+
+class FakeDB:
+    """The subset of ``asyncpg.Pool`` used by the settings managers."""
+
+    def __init__(self) -> None:
+        self.tables: Dict[str, Dict[int, Dict[str, Any]]] = {"guild": {}, "account": {}}
+        self.round_trips = 0
+
+    def _rows(self, query: str) -> Dict[int, Dict[str, Any]]:
+        self.round_trips += 1
+        return self.tables[re.search(r"(?:FROM|INTO|UPDATE) (\w+)", query)[1]]
+
+    async def fetchrow(self, query: str, *args: Any) -> Any:
+        return self._rows(query).get(args[0])
+
+    async def fetchval(self, query: str, *args: Any) -> Any:
+        row = self._rows(query).get(args[0])
+        return row and row[re.search(r"SELECT (\w+)", query)[1]]
+
+    async def fetch(self, query: str, *args: Any) -> List[Any]:
+        rows = self._rows(query)
+        return [rows[args[0]]] if args and args[0] in rows else []
+
+
+def guild(gid: int) -> Any:
+    return types.SimpleNamespace(id=gid)
+
+
+def make_bot(latency: float = 0.0) -> Any:
+    """A stand-in bot with real settings managers over the fakes."""
+    bot = types.SimpleNamespace(redis=FakeRedis(latency), db=FakeDB())
+    bot._prefix_cache = PrefixManager(bot)
+    bot._i18n_cache = I18nManager(bot)
+    bot._account_cache = AccountManager(bot)
+    bot._guild_cache = GuildManager(bot)
+    return bot
@@ -0,0 +1,88 @@
+"""Replay a mostly non-command message stream and report messages/second.
+
+Before, every message resolved the guild locale and regional format in an
+``on_message`` listener. Now they are resolved in ``Obsidion.invoke`` only
+once a command is found, and messages which cannot start with any prefix in
+use are rejected before the prefix lookup. Redis is simulated with a fixed
+round trip latency and the in-process cache is disabled so every lookup
+reaches it.
+
+Run with ``python -m benchmarks.message_replay``, the bot settings must be
+available in the environment or a ``.env`` file.
+"""
+import asyncio
+import random
+import time
+import types
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import List
+
+from obsidion.core.i18n import set_contextual_locales_from_guild
+from obsidion.core.settings_cache import LocalCache
+
+from ._fakes import guild
+from ._fakes import make_bot
+
+MESSAGES = 5000
+GUILDS = 500
+COMMAND_RATIO = 0.02
+LATENCY = 0.0002
+
+
+def make_stream() -> List[Any]:
+    stream = []
+    for _ in range(MESSAGES):
+        command = random.random() < COMMAND_RATIO
+        content = "mc?ping" if command else "just chatting"
+        stream.append(
+            types.SimpleNamespace(
+                guild=guild(random.randrange(GUILDS)), content=content
+            )
+        )
+    return stream
+
+
+async def before(bot: Any, message: Any) -> None:
+    await set_contextual_locales_from_guild(bot, message.guild)
+    prefixes = await bot._prefix_cache.get_prefixes(message.guild)
+    message.content.startswith(tuple(prefixes))
+
+
+async def after(bot: Any, message: Any) -> None:
+    prefixes = await bot._prefix_cache.get_prefixes(message.guild)
+    if message.content.startswith(tuple(prefixes)):
+        await set_contextual_locales_from_guild(bot, message.guild)
+
+
+async def prefiltered(bot: Any, message: Any) -> None:
+    if not bot._prefix_cache.index.could_match(message.content):
+        return
+    await after(bot, message)
+
+
+async def replay(
+    handler: Callable[[Any, Any], Awaitable[None]], stream: List[Any]
+) -> None:
+    bot = make_bot(LATENCY)
+    bot._guild_cache._local = LocalCache(maxsize=0)
+    start = time.perf_counter()
+    for message in stream:
+        await handler(bot, message)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{handler.__name__}: {MESSAGES / elapsed:,.0f} messages/s, "
+        f"{bot.redis.round_trips / MESSAGES:.2f} Redis round trips/message"
+    )
+
+
+async def main() -> None:
+    stream = make_stream()
+    await replay(before, stream)
+    await replay(after, stream)
+    await replay(prefiltered, stream)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""Count Redis round trips per message for the guild settings lookups.
+
+Every message resolves the guild prefix, locale and regional format. This
+replays a stream of messages from a handful of guilds and compares the old
+``exists``/``get``/``set`` access pattern with the current settings managers.
+
+Run with ``python -m benchmarks.settings_round_trips``, the bot settings must
+be available in the environment or a ``.env`` file.
+"""
+import asyncio
+import random
+
+from ._fakes import FakeRedis
+from ._fakes import guild
+from ._fakes import make_bot
+
+MESSAGES = 10000
+GUILDS = 500
+
+
+async def legacy_lookup(redis: FakeRedis, key: str, default: str) -> str:
+    """The access pattern every getter used before the cache helper."""
+    if await redis.exists(key):
+        value = (await redis.get(key)).decode("UTF-8")
+    else:
+        value = default
+    await redis.set(key, value, expire=28800)
+    return value
+
+
+async def main() -> None:
+    stream = [guild(random.randrange(GUILDS)) for _ in range(MESSAGES)]
+
+    redis = FakeRedis()
+    for message_guild in stream:
+        for name in ("prefix", "locale", "regional"):
+            await legacy_lookup(redis, f"{name}_{message_guild.id}", "mc?")
+    print(f"before: {redis.round_trips / MESSAGES:.2f} Redis round trips/message")
+
+    for label, in_process in (("after", True), ("after (no L1)", False)):
+        bot = make_bot()
+        for message_guild in stream:
+            if not in_process:
+                bot._guild_cache._local.clear()
+            await bot._prefix_cache.get_prefixes(message_guild)
+            await bot._i18n_cache.get_locale(message_guild)
+            await bot._i18n_cache.get_regional_format(message_guild)
+        print(
+            f"{label}: {bot.redis.round_trips / MESSAGES:.2f} Redis and "
+            f"{bot.db.round_trips / MESSAGES:.2f} DB round trips/message"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+"""Create player table
+
+Revision ID: 3f2a9c4d7e1b
+Revises: 851d11b8a33e
+Create Date: 2021-06-12 10:41:07.218394
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "3f2a9c4d7e1b"
+down_revision = "851d11b8a33e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "player",
+        sa.Column("uuid", sa.dialects.postgresql.UUID, primary_key=True),
+        sa.Column("username", sa.Unicode(16), nullable=False),
+        sa.Column("data", sa.JSON, nullable=False),
+        sa.Column(
+            "fetched_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.create_index("ix_player_username_lower", "player", [sa.text("lower(username)")])
+
+
+def downgrade():
+    op.drop_index("ix_player_username_lower", table_name="player")
+    op.drop_table("player")
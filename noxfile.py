@@ -95,6 +95,19 @@ def precommit(session: Session) -> None:
         activate_virtualenv_in_precommit_hooks(session)
 
 
+@session(python="3.8")
+def locales(session: Session) -> None:
+    """Compile the translation catalogs to binary .mo files."""
+    session.install("babel")
+    for po_path in Path(package).rglob("*.po"):
+        session.run(
+            "pybabel",
+            "compile",
+            f"--input-file={po_path}",
+            f"--output-file={po_path.with_suffix('.mo')}",
+        )
+
+
 @session(python="3.8")
 def safety(session: Session) -> None:
     """Scan dependencies for insecure packages."""
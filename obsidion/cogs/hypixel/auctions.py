@@ -0,0 +1,458 @@
+"""In-memory search index and price table over every Skyblock auction."""
+import bisect
+import difflib
+import functools
+import heapq
+import json
+import math
+import re
+import time
+from array import array
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import aioredis
+from obsidion.core import cache
+
+SCAN_KEY = "hypixel_auction_scan"
+# Scans are only useful until the next one, kept a little longer in case it fails
+SCAN_TTL = 10 * 60
+SCAN_LOCK = "hypixel_auction_scan_lock"
+# When the stored scan was taken, so it is only loaded when it is new
+SCAN_TIME_KEY = "hypixel_auction_scan_time"
+_WORD_RE = re.compile(r"[a-z0-9']+")
+# Pet levels and dungeon stars, pet levels are added back bucketed
+_ITEM_NOISE_RE = re.compile(r"\[lvl \d+\]|[\u272a\u2727\u2726]+")
+_PET_LEVEL_RE = re.compile(r"\[lvl (\d+)\]", re.IGNORECASE)
+_LEVEL_SUFFIX_RE = re.compile(r" lvl \d+$")
+# How close a word has to be to a term to match it when no term starts with it
+FUZZY_CUTOFF = 0.8
+
+
+def words(text: str) -> List[str]:
+    """Split an item name into lowercase search terms."""
+    return _WORD_RE.findall(text.lower())
+
+
+def _level_bucket(level: str) -> int:
+    """Bucket pet levels by ten, 1 to 9 are bucketed together as 1."""
+    return max(1, int(level) // 10 * 10)
+
+
+def _item_name(name: str) -> str:
+    """Normalise an item name, keeping the bucketed pet level at the end."""
+    name = name.lower()
+    level = _PET_LEVEL_RE.search(name)
+    name = " ".join(words(_ITEM_NOISE_RE.sub("", name)))
+    if level is not None:
+        name += f" lvl {_level_bucket(level.group(1))}"
+    return name
+
+
+def _display_name(name: str) -> str:
+    """Show the pet level bucket an item is priced under instead of its level."""
+    return _PET_LEVEL_RE.sub(
+        lambda level: f"[Lvl {_level_bucket(level.group(1))}+]", name
+    )
+
+
+@functools.lru_cache(maxsize=16384)
+def item_key(name: str, tier: str) -> str:
+    """Name auctions of the same item, tier and pet level are priced under."""
+    return f"{tier.lower()} {_item_name(name)}"
+
+
+class AuctionRow(NamedTuple):
+    """One auction read back out of the index."""
+
+    uuid: str
+    name: str
+    tier: str
+    category: str
+    price: int
+    bin: bool
+    end: float
+
+
+class AuctionQuery(NamedTuple):
+    """A parsed ``auctions search`` query."""
+
+    words: List[str]
+    min_price: Optional[int] = None
+    max_price: Optional[int] = None
+    tier: Optional[str] = None
+    category: Optional[str] = None
+    bin_only: bool = False
+
+
+_SUFFIXES = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+
+
+def parse_price(value: str) -> int:
+    """Parse a price such as ``1500``, ``250k`` or ``1.5m``.
+
+    Raises:
+        ValueError: the price is not a finite number
+    """
+    value = value.lower().replace(",", "")
+    multiplier = _SUFFIXES.get(value[-1:], 1)
+    if multiplier != 1:
+        value = value[:-1]
+    price = float(value) * multiplier
+    if not math.isfinite(price):
+        raise ValueError(f"price is not finite: {value}")
+    return int(price)
+
+
+def parse_query(query: str) -> AuctionQuery:
+    """Parse words and ``min:``, ``max:``, ``tier:``, ``category:`` and ``bin``.
+
+    Raises:
+        ValueError: a price filter is not a number
+    """
+    terms = []
+    filters: Dict[str, Any] = {}
+    for part in query.lower().split():
+        name, sep, value = part.partition(":")
+        if sep and name in ("min", "max"):
+            filters[f"{name}_price"] = parse_price(value)
+        elif sep and name in ("tier", "category"):
+            filters[name] = value
+        elif part == "bin":
+            filters["bin_only"] = True
+        else:
+            terms.extend(words(part))
+    return AuctionQuery(terms, **filters)
+
+
+class AuctionIndex:
+    """Auctions stored column by column with an inverted index over them.
+
+    Name words, tiers and categories map to the rows that have them. Call
+    ``add`` with each page of raw auctions then ``finish`` before searching.
+
+    Parameters
+    ----------
+    taken_at : float, optional
+        Unix time the scan started, defaults to now.
+    """
+
+    def __init__(self, taken_at: Optional[float] = None) -> None:
+        self.taken_at = time.time() if taken_at is None else taken_at
+        self.uuids: List[str] = []
+        self.names: List[str] = []
+        self.tiers: List[str] = []
+        self.categories: List[str] = []
+        self.prices = array("q")
+        self.bins = bytearray()
+        self.ends = array("d")
+        self._postings: Dict[str, array] = {}
+        self._terms: List[str] = []
+        self._seen: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.uuids)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.taken_at
+
+    def _post(self, term: str, row: int) -> None:
+        postings = self._postings.get(term)
+        if postings is None:
+            postings = self._postings[term] = array("I")
+        # Names repeat words, keep each row once per term
+        if not postings or postings[-1] != row:
+            postings.append(row)
+
+    def add(self, auctions: Iterable[Dict[str, Any]]) -> None:
+        """Add raw auctions as returned by the auctions endpoint."""
+        for auction in auctions:
+            # Pages shift while they are fetched, so an auction can be on two
+            if auction.get("claimed") or auction["uuid"] in self._seen:
+                continue
+            self._seen.add(auction["uuid"])
+            self._append(
+                auction["uuid"],
+                auction["item_name"],
+                auction["tier"].lower(),
+                auction["category"].lower(),
+                max(auction["starting_bid"], auction.get("highest_bid_amount", 0)),
+                bool(auction.get("bin")),
+                auction["end"] / 1000,
+            )
+
+    def _append(
+        self,
+        uuid: str,
+        name: str,
+        tier: str,
+        category: str,
+        price: int,
+        is_bin: bool,
+        end: float,
+    ) -> None:
+        row = len(self.uuids)
+        self.uuids.append(uuid)
+        self.names.append(name)
+        self.tiers.append(tier)
+        self.categories.append(category)
+        self.prices.append(price)
+        self.bins.append(1 if is_bin else 0)
+        self.ends.append(end)
+        for word in words(name):
+            self._post(word, row)
+        self._post(f"tier:{tier}", row)
+        self._post(f"category:{category}", row)
+
+    def finish(self) -> None:
+        """Sort the terms so they can be searched by prefix."""
+        self._terms = sorted(t for t in self._postings if ":" not in t)
+        self._seen.clear()
+
+    def _rows_for_word(self, word: str) -> Set[int]:
+        start = bisect.bisect_left(self._terms, word)
+        end = bisect.bisect_left(self._terms, word + "\uffff")
+        terms = self._terms[start:end]
+        if not terms:
+            terms = difflib.get_close_matches(
+                word, self._terms, n=5, cutoff=FUZZY_CUTOFF
+            )
+        rows: Set[int] = set()
+        for term in terms:
+            rows.update(self._postings[term])
+        return rows
+
+    def row(self, row: int) -> AuctionRow:
+        return AuctionRow(
+            self.uuids[row],
+            self.names[row],
+            self.tiers[row],
+            self.categories[row],
+            self.prices[row],
+            bool(self.bins[row]),
+            self.ends[row],
+        )
+
+    def search(self, query: AuctionQuery, limit: int = 30) -> List[AuctionRow]:
+        """Find the cheapest auctions matching every word and filter."""
+        candidates: List[Set[int]] = [self._rows_for_word(w) for w in query.words]
+        for name, value in (("tier", query.tier), ("category", query.category)):
+            if value is not None:
+                candidates.append(set(self._postings.get(f"{name}:{value}", ())))
+        if candidates:
+            candidates.sort(key=len)
+            rows = candidates[0].intersection(*candidates[1:])
+        else:
+            # Only price or bin filters, which apply to every auction
+            rows = set(range(len(self)))
+
+        prices = self.prices
+        if query.min_price is not None:
+            rows = {r for r in rows if prices[r] >= query.min_price}
+        if query.max_price is not None:
+            rows = {r for r in rows if prices[r] <= query.max_price}
+        if query.bin_only:
+            rows = {r for r in rows if self.bins[r]}
+        cheapest = heapq.nsmallest(limit, rows, key=prices.__getitem__)
+        return [self.row(r) for r in cheapest]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "taken_at": self.taken_at,
+            "uuids": self.uuids,
+            "names": self.names,
+            "tiers": self.tiers,
+            "categories": self.categories,
+            "prices": self.prices.tolist(),
+            "bins": list(self.bins),
+            "ends": self.ends.tolist(),
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "AuctionIndex":
+        index = cls(data["taken_at"])
+        for row in zip(
+            data["uuids"],
+            data["names"],
+            data["tiers"],
+            data["categories"],
+            data["prices"],
+            data["bins"],
+            data["ends"],
+        ):
+            index._append(*row)
+        index.finish()
+        return index
+
+    async def save(self, redis: aioredis.Redis) -> None:
+        """Store the scan so it is shared by every process."""
+        tr = redis.multi_exec()
+        tr.set(SCAN_KEY, json.dumps(self.to_json()), expire=SCAN_TTL)
+        tr.set(SCAN_TIME_KEY, self.taken_at, expire=SCAN_TTL)
+        await tr.execute()
+
+    @staticmethod
+    async def last_scan(redis: aioredis.Redis) -> Optional[float]:
+        """Get when the stored scan was taken, if there is one."""
+        taken_at = await cache.get(redis, SCAN_TIME_KEY)
+        return None if taken_at is None else float(taken_at)
+
+    @classmethod
+    async def load(cls, redis: aioredis.Redis) -> Optional["AuctionIndex"]:
+        """Get the last stored scan, if there is one."""
+        data = await cache.get_json(redis, SCAN_KEY)
+        if data is cache.MISSING:
+            return None
+        return cls.from_json(data)
+
+
+async def claim_scan(redis: aioredis.Redis, ttl: int) -> bool:
+    """Claim scanning the auction house next so only one process does it."""
+    return await redis.set(SCAN_LOCK, "1", expire=ttl, exist=redis.SET_IF_NOT_EXIST)
+
+
+class ItemPrice(NamedTuple):
+    """Prices of the BIN listings of one item.
+
+    Auctions are only counted, their bids are not what the item sells for
+    until they end.
+    """
+
+    name: str
+    tier: str
+    listings: int
+    auctions: int
+    lowest_bin: Optional[int]
+    median: Optional[int]
+    p10: Optional[int]
+    p90: Optional[int]
+
+
+def _percentile(prices: List[int], q: float) -> int:
+    """Nearest rank percentile of sorted prices."""
+    return prices[max(0, math.ceil(q * len(prices)) - 1)]
+
+
+class PriceTable:
+    """Price statistics for every item, kept up to date between scans.
+
+    Items are keyed by ``item_key``. Each item keeps the prices of its BIN
+    listings sorted and a count of its auctions, ``update`` compares a new
+    scan with the last one and only moves the auctions that were added,
+    removed or rebid, then recomputes the items they belong to.
+    """
+
+    def __init__(self) -> None:
+        self.items: Dict[str, ItemPrice] = {}
+        self.changed = 0
+        self._auctions: Dict[str, Tuple[str, int, bool]] = {}
+        self._bins: Dict[str, List[int]] = {}
+        self._bids: Dict[str, int] = {}
+        self._names: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _insert(self, key: str, price: int, is_bin: bool) -> None:
+        if is_bin:
+            bisect.insort(self._bins.setdefault(key, []), price)
+        else:
+            self._bids[key] = self._bids.get(key, 0) + 1
+
+    def _remove(self, key: str, price: int, is_bin: bool) -> None:
+        if is_bin:
+            prices = self._bins[key]
+            del prices[bisect.bisect_left(prices, price)]
+            if not prices:
+                del self._bins[key]
+        else:
+            self._bids[key] -= 1
+            if not self._bids[key]:
+                del self._bids[key]
+
+    def update(self, index: AuctionIndex) -> None:
+        """Apply the differences between a new scan and the previous one."""
+        current: Dict[str, Tuple[str, int, bool]] = {}
+        dirty: Set[str] = set()
+        previous = self._auctions
+        for row, uuid in enumerate(index.uuids):
+            # Each auction is only counted once even if a scan repeats it
+            if uuid in current:
+                continue
+            auction = previous.pop(uuid, None)
+            name = index.names[row]
+            listing = (
+                item_key(name, index.tiers[row]),
+                index.prices[row],
+                bool(index.bins[row]),
+            )
+            current[uuid] = listing
+            if auction == listing:
+                continue
+            if auction is not None:
+                self._remove(*auction)
+                dirty.add(auction[0])
+            self._insert(*listing)
+            self._names[listing[0]] = _display_name(name)
+            dirty.add(listing[0])
+        # Whatever is left has ended or been claimed since the last scan
+        for auction in previous.values():
+            self._remove(*auction)
+            dirty.add(auction[0])
+        self.changed = len(dirty)
+        self._auctions = current
+
+        for key in dirty:
+            self._price(key)
+
+    def _price(self, key: str) -> None:
+        bins = self._bins.get(key, [])
+        auctions = self._bids.get(key, 0)
+        if not bins and not auctions:
+            self.items.pop(key, None)
+            self._names.pop(key, None)
+            return
+        self.items[key] = ItemPrice(
+            self._names[key],
+            key.partition(" ")[0],
+            len(bins),
+            auctions,
+            bins[0] if bins else None,
+            _percentile(bins, 0.5) if bins else None,
+            _percentile(bins, 0.1) if bins else None,
+            _percentile(bins, 0.9) if bins else None,
+        )
+
+    def find(self, name: str) -> Optional[ItemPrice]:
+        """Get the prices of an item by name, allowing for typos.
+
+        The name can start with a tier and include a pet level, without them
+        the tier and level with the most BIN listings is picked.
+        """
+        key = _item_name(name)
+        price = self.items.get(key)
+        if price is not None:
+            return price
+        variants: Dict[str, List[ItemPrice]] = {}
+        for variant, item in self.items.items():
+            # Each item can be asked for without its tier, its pet level or both
+            name = variant.partition(" ")[2]
+            for alias in {
+                name,
+                _LEVEL_SUFFIX_RE.sub("", name),
+                _LEVEL_SUFFIX_RE.sub("", variant),
+            }:
+                variants.setdefault(alias, []).append(item)
+        if key not in variants:
+            match = difflib.get_close_matches(key, variants, n=1, cutoff=0.6)
+            if not match:
+                return None
+            key = match[0]
+        return max(variants[key], key=lambda item: (item.listings, item.auctions))
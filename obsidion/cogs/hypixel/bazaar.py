@@ -0,0 +1,215 @@
+"""Compact in-memory copies of the Skyblock bazaar."""
+import datetime
+import difflib
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from asyncpixel.models import Bazaar
+
+# Samples kept per product, a day of snapshots taken once a minute
+HISTORY_SAMPLES = 1440
+
+
+class BazaarProduct(NamedTuple):
+    """Quick status of one bazaar product."""
+
+    product_id: str
+    name: str
+    sell_price: float
+    buy_price: float
+    sell_volume: int
+    buy_volume: int
+
+
+class BazaarSnapshot(NamedTuple):
+    """Every bazaar product at one point in time."""
+
+    products: Tuple[BazaarProduct, ...]
+    fetched_at: datetime.datetime
+
+    @classmethod
+    def from_bazaar(cls, data: Bazaar) -> "BazaarSnapshot":
+        products = tuple(
+            BazaarProduct(
+                item.product_id,
+                item.product_id.replace("_", " ").title(),
+                item.quick_status.sell_price,
+                item.quick_status.buy_price,
+                item.quick_status.sell_volume,
+                item.quick_status.buy_volume,
+            )
+            for item in data.bazaar_items
+        )
+        return cls(products, datetime.datetime.now(datetime.timezone.utc))
+
+
+class Flip(NamedTuple):
+    """A product that can be bought by order and sold by offer for a profit."""
+
+    name: str
+    sell_price: float
+    buy_price: float
+    margin: float
+    margin_percent: float
+
+
+class Movement(NamedTuple):
+    """How far a product's buy price has moved over a window."""
+
+    name: str
+    buy_price: float
+    average: float
+    change_percent: float
+
+
+class BazaarHistory:
+    """Fixed size ring buffers of bazaar prices, one row per product.
+
+    Each snapshot fills one column, overwriting the oldest once the buffers
+    are full. Queries work on whole columns so they cost the same for one
+    product as for all of them.
+
+    Parameters
+    ----------
+    samples : int
+        How many snapshots are kept.
+    """
+
+    FIELDS = ("sell_price", "buy_price", "sell_volume", "buy_volume")
+
+    def __init__(self, samples: int = HISTORY_SAMPLES) -> None:
+        self.samples = samples
+        self.count = 0
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._next = 0
+        self._data = {
+            field: np.full((0, samples), np.nan, dtype=np.float32)
+            for field in self.FIELDS
+        }
+
+    def _row(self, product: BazaarProduct) -> int:
+        row = self._rows.get(product.product_id)
+        if row is None:
+            row = self._rows[product.product_id] = len(self.ids)
+            self.ids.append(product.product_id)
+            self.names.append(product.name)
+        return row
+
+    def record(self, snapshot: BazaarSnapshot) -> None:
+        """Add a snapshot as the newest sample."""
+        rows = np.fromiter((self._row(p) for p in snapshot.products), dtype=np.intp)
+        for field, data in self._data.items():
+            if data.shape[0] < len(self.ids):
+                # Products added to the bazaar get a row with no history
+                grown = np.full((len(self.ids), self.samples), np.nan, np.float32)
+                grown[: data.shape[0]] = data
+                self._data[field] = data = grown
+            column = data[:, self._next]
+            column.fill(np.nan)
+            column[rows] = [getattr(p, field) for p in snapshot.products]
+        self._next = (self._next + 1) % self.samples
+        self.count = min(self.count + 1, self.samples)
+
+    def _window(self, field: str, samples: int) -> np.ndarray:
+        """The last ``samples`` samples of ``field``, oldest first."""
+        samples = max(1, min(samples, self.count))
+        columns = (self._next - samples + np.arange(samples)) % self.samples
+        return self._data[field][:, columns]
+
+    def latest(self, field: str) -> np.ndarray:
+        return self._data[field][:, (self._next - 1) % self.samples]
+
+    def find(self, query: str) -> Optional[int]:
+        """Find a product by its name or id, allowing for typos."""
+        query = query.lower()
+        for row, (product_id, name) in enumerate(zip(self.ids, self.names)):
+            if query in (product_id.lower(), name.lower()):
+                return row
+        names = [name.lower() for name in self.names]
+        match = difflib.get_close_matches(query, names, n=1, cutoff=0.6)
+        return names.index(match[0]) if match else None
+
+    def flips(self, limit: int = 10) -> List[Flip]:
+        """Products with the largest gap between buy and sell price."""
+        sell = self.latest("sell_price")
+        buy = self.latest("buy_price")
+        traded = (
+            (sell > 0)
+            & (self.latest("sell_volume") > 0)
+            & (self.latest("buy_volume") > 0)
+        )
+        margin = np.where(traded, buy - sell, np.nan)
+        rows = _top(margin, limit)
+        return [
+            Flip(
+                self.names[r],
+                float(sell[r]),
+                float(buy[r]),
+                float(margin[r]),
+                float(margin[r] / sell[r] * 100),
+            )
+            for r in rows
+        ]
+
+    def movers(self, samples: int, limit: int = 10) -> Tuple[List[Movement], ...]:
+        """Products whose buy price rose and fell the most over ``samples``.
+
+        Returns:
+            Tuple[List[Movement], ...]: the biggest risers then fallers
+        """
+        window = self._window("buy_price", samples)
+        last = window[:, -1]
+        change = _change(window)
+        average = _mean(window)
+
+        def movements(rows: np.ndarray) -> List[Movement]:
+            return [
+                Movement(
+                    self.names[r], float(last[r]), float(average[r]), float(change[r])
+                )
+                for r in rows
+            ]
+
+        risers = np.where(change > 0, change, np.nan)
+        fallers = np.where(change < 0, -change, np.nan)
+        return movements(_top(risers, limit)), movements(_top(fallers, limit))
+
+    def trend(self, row: int, samples: int) -> Movement:
+        """Moving average and change of one product over ``samples``."""
+        window = self._window("buy_price", samples)[row : row + 1]
+        return Movement(
+            self.names[row],
+            float(window[0, -1]),
+            float(_mean(window)[0]),
+            float(_change(window)[0]),
+        )
+
+
+def _change(window: np.ndarray) -> np.ndarray:
+    """Percent change of each row, NaN without two samples to compare."""
+    if window.shape[1] < 2:
+        return np.full(window.shape[0], np.nan)
+    first, last = window[:, 0], window[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(first > 0, (last - first) / first * 100, np.nan)
+
+
+def _mean(window: np.ndarray) -> np.ndarray:
+    """Mean of each row ignoring missing samples, NaN for rows with none."""
+    counts = np.count_nonzero(~np.isnan(window), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.nansum(window, axis=1) / counts
+
+
+def _top(values: np.ndarray, limit: int) -> np.ndarray:
+    """Rows of the ``limit`` largest values, largest first, ignoring NaN."""
+    rows = np.flatnonzero(~np.isnan(values))
+    if len(rows) > limit:
+        rows = rows[np.argpartition(values[rows], -limit)[-limit:]]
+    return rows[np.argsort(values[rows])[::-1]]
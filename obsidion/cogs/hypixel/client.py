@@ -0,0 +1,96 @@
+"""Hypixel API client with shared caching."""
+import asyncio
+import functools
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+import aiohttp
+import aioredis
+from asyncpixel import Hypixel as _Hypixel
+from asyncpixel.exceptions import ApiNoSuccess
+from obsidion.core import cache
+from obsidion.core.ratelimit import TokenBucket
+from obsidion.core.upstream import CircuitBreaker
+
+# Seconds each endpoint is cached for, endpoints not listed are not cached
+ENDPOINT_TTLS: Dict[str, int] = {
+    "watchdogstats": 300,
+    "boosters": 300,
+    "playerCount": 60,
+    "gameCounts": 60,
+    "leaderboards": 1800,
+    "skyblock/news": 1800,
+    "skyblock/bazaar": 60,
+    "skyblock/auctions": 60,
+    "guild": 600,
+    "status": 60,
+    "friends": 600,
+    "player": 120,
+    "recentGames": 120,
+    "skyblock/profile": 300,
+    "skyblock/profiles": 300,
+}
+
+# Errors that mean Hypixel itself is failing rather than the request
+FAILURES = (aiohttp.ClientError, asyncio.TimeoutError, ApiNoSuccess)
+
+
+class CachedHypixel(_Hypixel):
+    """``asyncpixel.Hypixel`` with responses cached in Redis.
+
+    Raw responses are cached by path and parameters so every process
+    shares them, the models are still built from them on each call. Only
+    requests that go to Hypixel pass the circuit breaker and rate limit.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        redis: aioredis.Redis,
+        breaker: CircuitBreaker,
+        bucket: TokenBucket,
+    ) -> None:
+        super().__init__(api_key)
+        self._redis = redis
+        self._breaker = breaker
+        self._bucket = bucket
+        self.cache = cache.SoftCache(stale_ttl=300)
+
+    async def _get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        key_required: Optional[bool] = True,
+    ) -> Dict[str, Any]:
+        fetch = functools.partial(self._fetch, path, params, key_required)
+        ttl = ENDPOINT_TTLS.get(path)
+        if ttl is None:
+            return await fetch()
+        query = "&".join(
+            f"{name}={value}"
+            for name, value in sorted((params or {}).items())
+            if name != "key"
+        )
+        return await self.cache.get(self._redis, f"hypixel_{path}?{query}", fetch, ttl)
+
+    async def auction_page(self, page: int) -> Dict[str, Any]:
+        """Get a raw page of auctions, bypassing the Redis cache.
+
+        Used to scan the whole auction house, which is too large to be worth
+        keeping in Redis. The endpoint does not need the API key.
+        """
+        return await self._fetch("skyblock/auctions", {"page": page}, False)
+
+    async def _fetch(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        key_required: Optional[bool],
+    ) -> Dict[str, Any]:
+        # Only requests made with the key count against its rate limit
+        if key_required:
+            await self._bucket.acquire()
+        return await self._breaker.call(
+            super()._get, path, dict(params or {}), key_required, failures=FAILURES
+        )
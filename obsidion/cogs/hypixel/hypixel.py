@@ -1,33 +1,283 @@
 """Images cog."""
+import asyncio
 import datetime
 import logging
+import math
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Set
 
 import discord
-from asyncpixel import Hypixel as _Hypixel
 from discord.ext import commands
+from discord.ext import tasks
 from discord_slash import cog_ext
 from discord_slash.utils.manage_commands import create_option
 from dpymenus import Page
 from dpymenus import PaginatedMenu
 from obsidion.core import get_settings
 from obsidion.core.i18n import cog_i18n
+from obsidion.core.i18n import get_locale
+from obsidion.core.i18n import set_contextual_locale
 from obsidion.core.i18n import Translator
 from obsidion.core.utils.chat_formatting import humanize_timedelta
 from obsidion.core.utils.utils import divide_array
 
+from .auctions import AuctionIndex
+from .auctions import claim_scan
+from .auctions import parse_query
+from .auctions import PriceTable
+from .bazaar import BazaarHistory
+from .bazaar import BazaarSnapshot
+from .bazaar import Movement
+from .client import CachedHypixel
+from .leaderboards import claim_snapshot
+from .leaderboards import game_name
+from .leaderboards import LeaderboardSnapshot
+from .leaderboards import Ranking
+
 
 log = logging.getLogger(__name__)
 
 _ = Translator("Hypixel", __file__)
 
+# Seconds between bazaar snapshots, the bazaar endpoint is cached as long
+BAZAAR_REFRESH = 60
+BAZAAR_PAGE_SIZE = 15
+# Products listed by the bazaar flips and movers commands
+BAZAAR_TOP = 10
+# Seconds between scans of the whole auction house and how many of its pages
+# are fetched at once
+AUCTION_REFRESH = 60
+AUCTION_CONCURRENCY = 8
+# Seconds between leaderboard snapshots, as long as the endpoint is cached
+LEADERBOARD_REFRESH = 1800
+
 
 @cog_i18n(_)
 class Hypixel(commands.Cog):
     def __init__(self, bot) -> None:
         """Init."""
         self.bot = bot
-        self.hypixel = _Hypixel(get_settings().HYPIXEL_API_TOKEN)
+        self.hypixel = CachedHypixel(
+            get_settings().HYPIXEL_API_TOKEN,
+            bot.redis,
+            bot.http_session.breaker("api.hypixel.net"),
+            bot.http_session.buckets["api.hypixel.net"],
+        )
+        self._bazaar: Optional[BazaarSnapshot] = None
+        # Pages for the current snapshot, rendered for every locale that has
+        # asked for them so far
+        self._bazaar_pages: Dict[str, List[Page]] = {}
+        self._bazaar_locales: Set[str] = {"en-US"}
+        self._bazaar_history = BazaarHistory()
+        self._auctions: Optional[AuctionIndex] = None
+        self._prices = PriceTable()
+        self._leaderboards: Optional[LeaderboardSnapshot] = None
+        self._leaderboard_pages: Dict[str, List[Page]] = {}
+        self._leaderboard_locales: Set[str] = {"en-US"}
+        self.refresh_bazaar.start()
+        self.ingest_auctions.start()
+        self.refresh_leaderboards.start()
+
+    def cog_unload(self) -> None:
+        """Stop the background refreshers on cog unload."""
+        self.refresh_bazaar.cancel()
+        self.ingest_auctions.cancel()
+        self.refresh_leaderboards.cancel()
+
+    @tasks.loop(seconds=AUCTION_REFRESH)
+    async def ingest_auctions(self) -> None:
+        try:
+            await self._ingest_auctions()
+        except Exception:
+            log.warning("Failed to scan the auction house", exc_info=True)
+
+    async def _ingest_auctions(self) -> None:
+        """Scan the auction house unless another process scanned it recently."""
+        redis = self.bot.redis
+        taken_at = await AuctionIndex.last_scan(redis)
+        # Same as the leaderboards, one process scans and the others load it
+        if (
+            taken_at is None or time.time() - taken_at >= AUCTION_REFRESH / 2
+        ) and await claim_scan(redis, AUCTION_REFRESH // 2):
+            index = await self._scan_auctions()
+            await index.save(redis)
+        elif taken_at is None or (
+            self._auctions is not None and self._auctions.taken_at >= taken_at
+        ):
+            return
+        else:
+            index = await AuctionIndex.load(redis)
+            if index is None:
+                return
+        self._prices.update(index)
+        self._auctions = index
+
+    async def _scan_auctions(self) -> AuctionIndex:
+        """Index every page of auctions, adding pages as they arrive."""
+        first = await self.hypixel.auction_page(0)
+        index = AuctionIndex()
+        index.add(first["auctions"])
+        semaphore = asyncio.Semaphore(AUCTION_CONCURRENCY)
+
+        async def fetch(page: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.hypixel.auction_page(page)
+
+        pages = [
+            asyncio.ensure_future(fetch(page)) for page in range(1, first["totalPages"])
+        ]
+        try:
+            for page in asyncio.as_completed(pages):
+                index.add((await page)["auctions"])
+        except BaseException:
+            # Stop the remaining pages and collect their errors
+            for page in pages:
+                page.cancel()
+            await asyncio.gather(*pages, return_exceptions=True)
+            raise
+        index.finish()
+        return index
+
+    @tasks.loop(seconds=BAZAAR_REFRESH)
+    async def refresh_bazaar(self) -> None:
+        try:
+            await self._update_bazaar()
+        except Exception:
+            log.warning("Failed to refresh the bazaar snapshot", exc_info=True)
+
+    async def _update_bazaar(self) -> None:
+        self._bazaar = BazaarSnapshot.from_bazaar(await self.hypixel.bazaar())
+        self._bazaar_history.record(self._bazaar)
+        self._bazaar_pages = self._render_locales(
+            self._bazaar_locales, self._render_bazaar
+        )
+
+    @staticmethod
+    def _render_locales(
+        locales: Set[str], render: Callable[[], List[Page]]
+    ) -> Dict[str, List[Page]]:
+        """Render pages in every locale that has asked for them."""
+        current = get_locale()
+        pages = {}
+        for locale in locales:
+            set_contextual_locale(locale)
+            pages[locale] = render()
+        set_contextual_locale(current)
+        return pages
+
+    def _render_bazaar(self) -> List[Page]:
+        """Render the snapshot in the current locale."""
+        split = list(divide_array(self._bazaar.products, BAZAAR_PAGE_SIZE))
+        pages = []
+        for index, products in enumerate(split):
+            page = Page(
+                title=_("Bazaar NPC Stats"),
+                description=_("Page {pg} of {total}").format(
+                    pg=index + 1, total=len(split)
+                ),
+                color=self.bot.color,
+            )
+            page.set_author(
+                name=_("Hypixel"), icon_url="https://hypixel.net/favicon-32x32.png"
+            )
+            page.set_thumbnail(
+                url="https://hypixel.net/styles/hypixel-v2/images/header-logo.png"
+            )
+            for product in products:
+                page.add_field(
+                    name=product.name,
+                    value=_("Sell Price: {sellprice} \n Buy Price: {buyprice}").format(
+                        sellprice=round(product.sell_price),
+                        buyprice=round(product.buy_price),
+                    ),
+                )
+            pages.append(page)
+        return pages
+
+    @tasks.loop(seconds=LEADERBOARD_REFRESH)
+    async def refresh_leaderboards(self) -> None:
+        try:
+            await self._update_leaderboards()
+        except Exception:
+            log.warning("Failed to refresh the leaderboard snapshot", exc_info=True)
+
+    async def _update_leaderboards(self) -> None:
+        """Take a snapshot unless another process took one recently."""
+        snapshot = await LeaderboardSnapshot.load(self.bot.redis)
+        # Half the interval, so this process's own last snapshot is replaced.
+        # The claim expires after as long, so one process takes it each time.
+        if (
+            snapshot is None or snapshot.age >= LEADERBOARD_REFRESH / 2
+        ) and await claim_snapshot(self.bot.redis, LEADERBOARD_REFRESH // 2):
+            snapshot = await self._take_leaderboard_snapshot(snapshot)
+        if snapshot is None:
+            return
+        self._leaderboards = snapshot
+        self._leaderboard_pages = self._render_locales(
+            self._leaderboard_locales, self._render_leaderboards
+        )
+
+    async def _take_leaderboard_snapshot(
+        self, previous: Optional[LeaderboardSnapshot]
+    ) -> LeaderboardSnapshot:
+        data = await self.hypixel.leaderboards()
+        # A cached response would only overwrite the deltas with zeros
+        if previous is not None and previous.same_leaders(data):
+            return previous
+        uuids = sorted(
+            {
+                str(uuid)
+                for boards in data.values()
+                for b in boards
+                for uuid in b.leaders
+            }
+        )
+        players = await self.bot.mojang_players(uuids)
+        names = {
+            uuid: player["username"]
+            for uuid, player in zip(uuids, players)
+            if player is not None
+        }
+        snapshot = LeaderboardSnapshot.from_leaderboards(data, names, previous)
+        await snapshot.save(self.bot.redis)
+        return snapshot
+
+    def _render_leaderboards(self) -> List[Page]:
+        """Render the first leaderboard of each game in the current locale."""
+        snapshot = self._leaderboards
+        boards = [boards[0] for boards in snapshot.boards.values() if boards]
+        pages = []
+        for index, board in enumerate(boards):
+            page = Page(
+                title=_("Current Hypixel Leaderboards for {title}").format(
+                    title=game_name(board.game)
+                ),
+                description=_("Page {pagenumber} of {total}").format(
+                    pagenumber=index + 1, total=len(boards)
+                ),
+                color=self.bot.color,
+            )
+            page.set_author(
+                name=_("Hypixel"), icon_url="https://hypixel.net/favicon-32x32.png"
+            )
+            page.set_thumbnail(
+                url="https://hypixel.net/styles/hypixel-v2/images/header-logo.png"
+            )
+            lines = [
+                f"{r.rank}. {snapshot.names.get(r.uuid, r.uuid)} {_format_change(r)}"
+                for r in board.rankings()
+            ]
+            page.add_field(
+                name=_("Top {leader} Leaderboard").format(leader=board.name),
+                value="\n".join(lines) or _("No players yet."),
+            )
+            pages.append(page)
+        return pages
 
     @commands.command()
     async def watchdogstats(self, ctx) -> None:
@@ -154,8 +404,7 @@ class Hypixel(commands.Cog):
         """Get the current status of an online player."""
         await ctx.channel.trigger_typing()
 
-        player_data = await self.bot.mojang_player(ctx.author, username)
-        uuid = player_data["uuid"]
+        uuid = await self.bot.mojang_uuid(ctx.author, username)
 
         data = await self.hypixel.player_status(uuid)
 
@@ -209,8 +458,7 @@ class Hypixel(commands.Cog):
     async def playerfriends(self, ctx, username: Optional[str] = None) -> None:
         """Get the current friends of a player."""
         await ctx.channel.trigger_typing()
-        player_data = await self.bot.mojang_player(ctx.author, username)
-        uuid = player_data["uuid"]
+        uuid = await self.bot.mojang_uuid(ctx.author, username)
 
         data = await self.hypixel.player_friends(uuid)
 
@@ -227,17 +475,17 @@ class Hypixel(commands.Cog):
         embed.set_thumbnail(url=f"https://visage.surgeplay.com/bust/{uuid}")
         embed.timestamp = ctx.message.created_at
 
-        for i in range(len(data)):
-            if str(data[i].uuid_receiver) == str(uuid):
-                friendusername = await self.bot.mojang_player(
-                    ctx.author, data[i].uuid_sender
-                )
-            else:
-                friendusername = await self.bot.mojang_player(
-                    ctx.author, data[i].uuid_receiver
-                )
+        friend_uuids = [
+            str(friend.uuid_sender)
+            if str(friend.uuid_receiver) == str(uuid)
+            else str(friend.uuid_receiver)
+            for friend in data
+        ]
+        friends = await self.bot.mojang_players(friend_uuids)
 
-            friendusername = friendusername["username"]
+        for i in range(len(data)):
+            friend = friends[i]
+            friendusername = friend["username"] if friend else friend_uuids[i]
 
             delta = datetime.datetime.now(tz=datetime.timezone.utc) - data[i].started
             friendstarted = humanize_timedelta(timedelta=delta)
@@ -269,46 +517,97 @@ class Hypixel(commands.Cog):
         await ctx.defer()
         await self.playerfriends(ctx, username)
 
-    @commands.command()
+    async def _ensure_bazaar(self, ctx) -> None:
+        if self._bazaar is None:
+            await ctx.channel.trigger_typing()
+            await self._update_bazaar()
+
+    @commands.group(invoke_without_command=True)
     async def bazaar(self, ctx) -> None:
         """Get Bazaar NPC stats."""
-        await ctx.channel.trigger_typing()
+        await self._ensure_bazaar(ctx)
+        locale = get_locale()
+        pages = self._bazaar_pages.get(locale)
+        if pages is None:
+            pages = self._bazaar_pages[locale] = self._render_bazaar()
+            self._bazaar_locales.add(locale)
 
         menu = PaginatedMenu(ctx)
-        data = await self.hypixel.bazaar()
-        split = list(divide_array(data.bazaar_items, 15))
-        pagesend = []
+        menu.add_pages(list(pages))
+        menu.set_timeout(90)
 
-        for bazaarloop in range(len(split)):
-            pagebazaar = Page(
-                title=_("Bazaar NPC Stats"),
-                description=_("Page {pg} of {total}").format(
-                    pg=bazaarloop + 1, total=len(split)
+        await menu.open()
+
+    @bazaar.command(name="flips")
+    async def bazaar_flips(self, ctx) -> None:
+        """Get the products with the largest margin between buy and sell."""
+        await self._ensure_bazaar(ctx)
+        embed = discord.Embed(title=_("Bazaar Flips"), colour=self.bot.color)
+        for flip in self._bazaar_history.flips(BAZAAR_TOP):
+            embed.add_field(
+                name=flip.name,
+                value=_(
+                    "Buy Price: {buy_price:,.1f} \n Sell Price: {sell_price:,.1f} \n "
+                    "Margin: {margin:,.1f} ({percent:.1f}%)"
+                ).format(
+                    buy_price=flip.buy_price,
+                    sell_price=flip.sell_price,
+                    margin=flip.margin,
+                    percent=flip.margin_percent,
                 ),
-                color=self.bot.color,
-            )
-            pagebazaar.set_author(
-                name=_("Hypixel"), icon_url="https://hypixel.net/favicon-32x32.png"
-            )
-            pagebazaar.set_thumbnail(
-                url="https://hypixel.net/styles/hypixel-v2/images/header-logo.png"
             )
-            for item in range(len(split[bazaarloop])):
-                name = split[bazaarloop][item].product_id.replace("_", " ").title()
-                sellprice = round(split[bazaarloop][item].quick_status.sell_price)
-                buyprice = round(split[bazaarloop][item].quick_status.buy_price)
-                pagebazaar.add_field(
-                    name=name,
-                    value=_("Sell Price: {sellprice} \n Buy Price: {buyprice}").format(
-                        sellprice=sellprice, buyprice=buyprice
-                    ),
+        await ctx.send(embed=embed)
+
+    @bazaar.command(name="movers")
+    async def bazaar_movers(self, ctx, hours: int = 1) -> None:
+        """Get the products whose buy price moved the most over some hours."""
+        await self._ensure_bazaar(ctx)
+        hours = max(1, min(hours, 24))
+        risers, fallers = self._bazaar_history.movers(hours * 60, BAZAAR_TOP)
+        embed = discord.Embed(
+            title=_("Bazaar Movers"),
+            description=_("Changes in buy price over the last {hours} hours.").format(
+                hours=hours
+            ),
+            colour=self.bot.color,
+        )
+        if self._bazaar_history.count < 2:
+            empty = _("Not enough history yet.")
+        else:
+            empty = _("No changes.")
+        for name, movements in ((_("Risers"), risers), (_("Fallers"), fallers)):
+            embed.add_field(
+                name=name,
+                value="\n".join(
+                    f"{m.name}: {m.change_percent:+.1f}%" for m in movements
                 )
-            pagesend.append(pagebazaar)
+                or empty,
+            )
+        await ctx.send(embed=embed)
 
-        menu.add_pages(pagesend)
-        menu.set_timeout(90)
+    @bazaar.command(name="trend")
+    async def bazaar_trend(self, ctx, *, item: str) -> None:
+        """Get the recent trend of one product's buy price."""
+        await self._ensure_bazaar(ctx)
+        row = self._bazaar_history.find(item)
+        if row is None:
+            await ctx.send(_("That product could not be found."))
+            return
+        hour = self._bazaar_history.trend(row, 60)
+        day = self._bazaar_history.trend(row, 24 * 60)
+        embed = discord.Embed(title=hour.name, colour=self.bot.color)
+        embed.add_field(name=_("Buy Price"), value=f"{hour.buy_price:,.1f}")
+        for name, movement in ((_("1 Hour"), hour), (_("24 Hours"), day)):
+            embed.add_field(name=name, value=self._format_movement(movement))
+        await ctx.send(embed=embed)
 
-        await menu.open()
+    @staticmethod
+    def _format_movement(movement: Movement) -> str:
+        if math.isnan(movement.change_percent):
+            return _("Not enough history yet.")
+        return _("Average: {average:,.1f} \n Change: {change:+.1f}%").format(
+            average=movement.average, change=movement.change_percent
+        )
 
     @cog_ext.cog_slash(name="bazaar")
     async def slash_bazaar(self, ctx):
@@ -316,7 +615,7 @@ class Hypixel(commands.Cog):
         await ctx.defer()
         await self.bazaar(ctx)
 
-    @commands.command()
+    @commands.group(invoke_without_command=True)
     async def auctions(self, ctx) -> None:
         """Get the first 30 auctions."""
 
@@ -368,6 +667,88 @@ class Hypixel(commands.Cog):
 
         await menu.open()
 
+    @auctions.command(name="search")
+    async def auctions_search(self, ctx, *, query: str) -> None:
+        """Search every auction by item name.
+
+        Narrow results with `min:` and `max:` prices such as `max:1.5m`,
+        `tier:`, `category:` and `bin`.
+        """
+        if self._auctions is None:
+            await ctx.send(_("Auctions are still loading, please try again shortly."))
+            return
+        try:
+            parsed = parse_query(query)
+        except ValueError:
+            await ctx.send(_("Please provide a valid price."))
+            return
+        results = self._auctions.search(parsed)
+        if not results:
+            await ctx.send(_("No auctions found."))
+            return
+
+        split = list(divide_array(results, 10))
+        pages = []
+        for index, rows in enumerate(split):
+            page = Page(
+                title=_("Auctions matching {query}").format(query=query),
+                description=_("Page {pg} of {total}").format(
+                    pg=index + 1, total=len(split)
+                ),
+                color=self.bot.color,
+            )
+            page.set_author(
+                name=_("Hypixel"), icon_url="https://hypixel.net/favicon-32x32.png"
+            )
+            for row in rows:
+                page.add_field(
+                    name=row.name,
+                    value=_(
+                        "Price: {price:,} ({kind}) \n Item Tier: {tier} \n "
+                        "Ends: <t:{end}:R>"
+                    ).format(
+                        price=row.price,
+                        kind=_("Buy It Now") if row.bin else _("Auction"),
+                        tier=row.tier.title(),
+                        end=int(row.end),
+                    ),
+                )
+            pages.append(page)
+
+        menu = PaginatedMenu(ctx)
+        menu.add_pages(pages)
+        menu.set_timeout(90)
+        await menu.open()
+
+    @commands.command()
+    async def price(self, ctx, *, item: str) -> None:
+        """Get what an item is selling for on the auction house."""
+        if self._auctions is None:
+            await ctx.send(_("Auctions are still loading, please try again shortly."))
+            return
+        price = self._prices.find(item)
+        if price is None:
+            await ctx.send(_("No auctions found."))
+            return
+        embed = discord.Embed(
+            title=f"{price.name} ({price.tier.replace('_', ' ').title()})",
+            description=_(
+                "Based on {listings:,} BIN listings, {auctions:,} auctions are "
+                "not counted."
+            ).format(listings=price.listings, auctions=price.auctions),
+            colour=self.bot.color,
+        )
+        if price.lowest_bin is None:
+            embed.add_field(name=_("Lowest BIN"), value=_("None"))
+        else:
+            embed.add_field(name=_("Lowest BIN"), value=f"{price.lowest_bin:,}")
+            embed.add_field(name=_("Median"), value=f"{price.median:,}")
+            embed.add_field(
+                name=_("10th - 90th Percentile"),
+                value=f"{price.p10:,} - {price.p90:,}",
+            )
+        await ctx.send(embed=embed)
+
     @cog_ext.cog_slash(name="auctions")
     async def slash_auctions(self, ctx):
         """Get the first 30 auctions."""
@@ -409,59 +790,83 @@ class Hypixel(commands.Cog):
         await ctx.defer()
         await self.guild(ctx, guildname)
 
+    async def _ensure_leaderboards(self, ctx) -> bool:
+        """Load the leaderboards if needed, telling the user if they are not."""
+        if self._leaderboards is None:
+            await ctx.channel.trigger_typing()
+            await self._update_leaderboards()
+        if self._leaderboards is None:
+            await ctx.send(
+                _("Leaderboards are still loading, please try again shortly.")
+            )
+            return False
+        return True
+
     @commands.command()
     async def leaderboards(self, ctx: commands.Context) -> None:
         """Get current hypixel leaderboards"""
-        await ctx.channel.trigger_typing()
+        if not await self._ensure_leaderboards(ctx):
+            return
+        locale = get_locale()
+        pages = self._leaderboard_pages.get(locale)
+        if pages is None:
+            pages = self._leaderboard_pages[locale] = self._render_leaderboards()
+            self._leaderboard_locales.add(locale)
 
-        data = await self.hypixel.leaderboards()
         menu = PaginatedMenu(ctx)
-        pagesend = []
-        pagenumber = 1
-
-        for i in data:
-            if data[i]:
-                pageleader = Page(
-                    title=_("Current Hypixel Leaderboards for {title}").format(
-                        title=data[i][0].title
-                    ),
-                    description=_("Page {pagenumber} of {total}").format(
-                        pagenumber=pagenumber, total=data[i][0].title
-                    ),
-                    color=self.bot.color,
-                )
-                pageleader.set_author(
-                    name=_("Hypixel"), icon_url="https://hypixel.net/favicon-32x32.png"
-                )
-                pageleader.set_thumbnail(
-                    url="https://hypixel.net/styles/hypixel-v2/images/header-logo.png"
-                )
-                leaderstring = ""
-
-                for leader in range(len(data[i][0].leaders)):
-                    player_data = await self.bot.mojang_player(
-                        ctx.author, data[i][0].leaders[leader]
-                    )
-                    username = player_data["username"]
-                    leaderstring += f"{username} \n"
-                pageleader.add_field(
-                    name=_("Top {leader} Leaderboard").format(leader=data[i][0].title),
-                    value=_(leaderstring),
-                )
-
-                pagesend.append(pageleader)
-                pagenumber += 1
-
-        menu.add_pages(pagesend)
+        menu.add_pages(list(pages))
         menu.set_timeout(90)
         menu.allow_multisession()
 
-        await ctx.send("Here")
-
         await menu.open()
 
+    @commands.command()
+    async def leaderboard(self, ctx: commands.Context, game: str, player: str) -> None:
+        """Get where a player ranks on a game's leaderboards."""
+        if not await self._ensure_leaderboards(ctx):
+            return
+        snapshot = self._leaderboards
+        game = snapshot.game(game)
+        if game is None:
+            await ctx.send(_("That game could not be found."))
+            return
+        rankings = snapshot.rankings(game, player)
+        if not rankings:
+            await ctx.send(
+                _("{player} is not on the {game} leaderboards.").format(
+                    player=player, game=game_name(game)
+                )
+            )
+            return
+        embed = discord.Embed(
+            title=_("{player} on the {game} Leaderboards").format(
+                player=snapshot.names.get(rankings[0].uuid, player),
+                game=game_name(game),
+            ),
+            colour=self.bot.color,
+        )
+        for ranking in rankings:
+            embed.add_field(
+                name=ranking.board.name,
+                value=f"#{ranking.rank} {_format_change(ranking)}",
+            )
+        await ctx.send(embed=embed)
+
     @cog_ext.cog_slash(name="leaderboards")
     async def slash_leaderboards(self, ctx):
         """Get's guild info by guild name."""
         await ctx.defer()
         await self.leaderboards(ctx)
+
+
+def _format_change(ranking: Ranking) -> str:
+    """Show how far a player moved since the previous snapshot."""
+    if not ranking.board.changes:
+        return ""
+    if ranking.change is None:
+        return _("(new)")
+    if ranking.change > 0:
+        return f"(\u25b2{ranking.change})"
+    if ranking.change < 0:
+        return f"(\u25bc{-ranking.change})"
+    return ""
@@ -0,0 +1,217 @@
+"""Snapshots of the Hypixel leaderboards with rank changes between them."""
+import difflib
+import time
+import uuid as uuid_lib
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+import aioredis
+from asyncpixel.models import Leaderboards
+from obsidion.core import cache
+
+SNAPSHOT_KEY = "hypixel_leaderboard_snapshot"
+# Snapshots are kept a week so deltas survive the bot being down for a while
+SNAPSHOT_TTL = 7 * 24 * 60 * 60
+SNAPSHOT_LOCK = "hypixel_leaderboard_snapshot_lock"
+
+
+class Leaderboard(NamedTuple):
+    """One leaderboard of a game, leaders are dashed uuids in rank order."""
+
+    game: str
+    path: str
+    prefix: str
+    title: str
+    leaders: Tuple[str, ...]
+    # Places each leader moved up since the previous snapshot, None for
+    # leaders that were not on it. Empty when there was no previous snapshot.
+    changes: Tuple[Optional[int], ...] = ()
+
+    @property
+    def key(self) -> str:
+        return f"{self.game}/{self.prefix}/{self.path}"
+
+    @property
+    def name(self) -> str:
+        return f"{self.prefix} {self.title}"
+
+    def rankings(self) -> List["Ranking"]:
+        return [
+            Ranking(self, index + 1, self.changes[index] if self.changes else None)
+            for index in range(len(self.leaders))
+        ]
+
+
+class Ranking(NamedTuple):
+    """Where a player is on one leaderboard."""
+
+    board: Leaderboard
+    rank: int
+    change: Optional[int]
+
+    @property
+    def uuid(self) -> str:
+        return self.board.leaders[self.rank - 1]
+
+
+def game_name(game: str) -> str:
+    return game.replace("_", " ").title()
+
+
+class LeaderboardSnapshot:
+    """Every leaderboard at one point in time, indexed by game and player.
+
+    Parameters
+    ----------
+    boards : Dict[str, List[Leaderboard]]
+        Leaderboards of each game.
+    names : Dict[str, str]
+        Usernames of the leaders by uuid.
+    taken_at : float
+        Unix time the snapshot was taken.
+    """
+
+    def __init__(
+        self,
+        boards: Dict[str, List[Leaderboard]],
+        names: Dict[str, str],
+        taken_at: float,
+    ) -> None:
+        self.boards = boards
+        self.names = names
+        self.taken_at = taken_at
+        self._games = {game.lower(): game for game in boards}
+        self._uuids = {name.lower(): uuid for uuid, name in names.items()}
+        self._ranks: Dict[Tuple[str, str], List[Ranking]] = {}
+        for game, game_boards in boards.items():
+            for board in game_boards:
+                for ranking in board.rankings():
+                    self._ranks.setdefault((game, ranking.uuid), []).append(ranking)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.taken_at
+
+    @classmethod
+    def from_leaderboards(
+        cls,
+        data: Dict[str, List[Leaderboards]],
+        names: Dict[str, str],
+        previous: Optional["LeaderboardSnapshot"] = None,
+    ) -> "LeaderboardSnapshot":
+        """Build a snapshot, comparing its ranks with ``previous``."""
+        positions: Dict[str, Dict[str, int]] = {}
+        if previous is not None:
+            for game_boards in previous.boards.values():
+                for board in game_boards:
+                    positions[board.key] = {
+                        uuid: rank for rank, uuid in enumerate(board.leaders)
+                    }
+        boards = {}
+        for game, game_boards in data.items():
+            boards[game] = []
+            for item in game_boards:
+                board = Leaderboard(
+                    game,
+                    item.path,
+                    item.prefix,
+                    item.title,
+                    tuple(str(uuid) for uuid in item.leaders),
+                )
+                if previous is not None:
+                    before = positions.get(board.key, {})
+                    changes = tuple(
+                        before[uuid] - rank if uuid in before else None
+                        for rank, uuid in enumerate(board.leaders)
+                    )
+                    board = board._replace(changes=changes)
+                boards[game].append(board)
+        return cls(boards, names, time.time())
+
+    def same_leaders(self, data: Dict[str, List[Leaderboards]]) -> bool:
+        """Whether ``data`` has exactly the leaders of this snapshot."""
+        leaders = {
+            board.key: board.leaders
+            for game_boards in self.boards.values()
+            for board in game_boards
+        }
+        fetched = {
+            f"{game}/{item.prefix}/{item.path}": tuple(str(u) for u in item.leaders)
+            for game, game_boards in data.items()
+            for item in game_boards
+        }
+        return leaders == fetched
+
+    def game(self, query: str) -> Optional[str]:
+        """Find a game by name, allowing for typos."""
+        query = query.lower().replace(" ", "_")
+        game = self._games.get(query)
+        if game is None:
+            match = difflib.get_close_matches(query, self._games, n=1, cutoff=0.6)
+            if match:
+                game = self._games[match[0]]
+        return game
+
+    def rankings(self, game: str, player: str) -> List[Ranking]:
+        """Get every leaderboard of ``game`` a player is on.
+
+        Args:
+            game (str): game as returned by ``game``
+            player (str): username or uuid of the player
+
+        Returns:
+            List[Ranking]: the player's rankings, empty if they are on none
+        """
+        try:
+            uuid = str(uuid_lib.UUID(player))
+        except ValueError:
+            uuid = self._uuids.get(player.lower())
+        return self._ranks.get((game, uuid), [])
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "taken_at": self.taken_at,
+            "names": self.names,
+            "boards": {
+                game: [board._asdict() for board in game_boards]
+                for game, game_boards in self.boards.items()
+            },
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "LeaderboardSnapshot":
+        boards = {
+            game: [
+                Leaderboard(
+                    **dict(
+                        board,
+                        leaders=tuple(board["leaders"]),
+                        changes=tuple(board["changes"]),
+                    )
+                )
+                for board in game_boards
+            ]
+            for game, game_boards in data["boards"].items()
+        }
+        return cls(boards, data["names"], data["taken_at"])
+
+    async def save(self, redis: aioredis.Redis) -> None:
+        """Store the snapshot so it is shared by every process."""
+        await cache.put_json(redis, SNAPSHOT_KEY, self.to_json(), SNAPSHOT_TTL)
+
+    @classmethod
+    async def load(cls, redis: aioredis.Redis) -> Optional["LeaderboardSnapshot"]:
+        """Get the last stored snapshot, if there is one."""
+        data = await cache.get_json(redis, SNAPSHOT_KEY)
+        if data is cache.MISSING:
+            return None
+        return cls.from_json(data)
+
+
+async def claim_snapshot(redis: aioredis.Redis, ttl: int) -> bool:
+    """Claim taking the next snapshot so only one process does it."""
+    return await redis.set(SNAPSHOT_LOCK, "1", expire=ttl, exist=redis.SET_IF_NOT_EXIST)
@@ -1,5 +1,4 @@
 """Info cog."""
-import json
 import logging
 from datetime import datetime
 from time import mktime
@@ -16,6 +15,7 @@ from discord.ext import commands
 from discord_slash import cog_ext
 from discord_slash import SlashContext
 from discord_slash.utils.manage_commands import create_option
+from obsidion.core import cache
 from obsidion.core import get_settings
 from obsidion.core.i18n import cog_i18n
 from obsidion.core.i18n import Translator
@@ -31,6 +31,7 @@ class Info(commands.Cog):
     def __init__(self, bot) -> None:
         """Init."""
         self.bot = bot
+        self._cache = cache.SoftCache(stale_ttl=600)
 
     @commands.command(
         aliases=["whois", "p", "names", "namehistory", "pastnames", "namehis"]
@@ -164,23 +165,21 @@ class Info(commands.Cog):
             return
         server_ip, _port = self.get_server(address, port)
         port = _port if _port else port
-        key = f"server_{server_ip}:{port}"
-        if await self.bot.redis.exists(key):
-            data = json.loads(await self.bot.redis.get(key))
-        else:
-            params: Dict[str, Union[str, int]] = (
-                {"server": address}
-                if port is None
-                else {"server": address, "port": port}
-            )
+        params: Dict[str, Union[str, int]] = (
+            {"server": address} if port is None else {"server": address, "port": port}
+        )
+
+        async def fetch_server() -> Optional[Dict[str, Any]]:
             async with self.bot.http_session.get(
                 f"{get_settings().API_URL}/server/java", params=params
             ) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
-                else:
-                    data = None
-            await self.bot.redis.set(key, json.dumps(data), expire=600)
+                    return await resp.json()
+                return None
+
+        data = await self._cache.get(
+            self.bot.redis, f"server_{server_ip}:{port}", fetch_server, ttl=600
+        )
         if data is None:
             await ctx.send(_("server could not be reached."))
             return
@@ -333,14 +332,16 @@ class Info(commands.Cog):
         }
         payload = {"metricKeys": [k for (k, v) in sales_mapping.items() if v]}
 
-        if await self.bot.redis.exists("status"):
-            sales_data = json.loads(await self.bot.redis.get("status"))
-        else:
+        async def fetch_sales() -> Optional[Dict[str, Any]]:
             url = "https://api.mojang.com/orders/statistics"
             async with ctx.bot.http_session.post(url, json=payload) as resp:
                 if resp.status == 200:
-                    sales_data = await resp.json()
-            await self.bot.redis.set("status", json.dumps(sales_data))
+                    return await resp.json()
+                return None
+
+        sales_data = await self._cache.get(
+            self.bot.redis, "status", fetch_sales, ttl=600
+        )
 
         services = ""
         for service in data:
@@ -353,12 +354,13 @@ class Info(commands.Cog):
                     ":heart: - {service}: **This service is offline.** \n"
                 ).format(service=service)
         embed = discord.Embed(title=_("Minecraft Service Status"), color=0x00FF00)
-        embed.add_field(
-            name="Minecraft Game Sales",
-            value=_("Total Sales: **{total}** Last 24 Hours: **{last}**").format(
-                total=sales_data["total"], last=sales_data["last24h"]
-            ),
-        )
+        if sales_data is not None:
+            embed.add_field(
+                name="Minecraft Game Sales",
+                value=_("Total Sales: **{total}** Last 24 Hours: **{last}**").format(
+                    total=sales_data["total"], last=sales_data["last24h"]
+                ),
+            )
         embed.add_field(name=_("Minecraft Services:"), value=services, inline=False)
 
         await ctx.send(embed=embed)
@@ -1,29 +1,53 @@
 """Main bot file."""
-import json
-import socket
+import asyncio
+import logging
+import re
 import sys
+import time
+import uuid as uuid_lib
 from enum import IntEnum
 from typing import Any
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 
 import aiohttp
 import aioredis
 import asyncpg
 import discord
+from discord.ext import commands
 from discord.ext.commands import AutoShardedBot
+from discord.ext.commands import when_mentioned
 from discord.ext.commands import when_mentioned_or
 
+from . import cache
+from .cache import MISSING
 from .config import get_settings
 from .config import PlayerNotExist
+from .config import UpstreamUnavailable
 from .core_commands import Core
 from .events import Events
 from .global_checks import init_global_checks
+from .i18n import set_contextual_locales_from_guild
+from .players import PlayerStore
 from .settings_cache import AccountManager
+from .settings_cache import claim_warmup
 from .settings_cache import GuildManager
 from .settings_cache import I18nManager
+from .settings_cache import listen_for_invalidations
 from .settings_cache import PrefixManager
+from .upstream import UpstreamClient
+from .utils.batching import MicroBatcher
+
+log = logging.getLogger("obsidion")
+
+# Upper bound on concurrent upstream requests made by one batched player lookup
+PLAYER_LOOKUP_CONCURRENCY = 8
+# Names the bulk profile endpoint accepts, anything else is looked up on its own
+USERNAME_RE = re.compile(r"^[A-Za-z0-9_]{1,16}$")
+# Cached in place of a uuid for usernames that do not exist
+UNKNOWN_USERNAME = b""
 
 
 class Obsidion(AutoShardedBot):
@@ -31,9 +55,7 @@ class Obsidion(AutoShardedBot):
 
     redis: aioredis.Redis
     db: asyncpg.Pool
-    http_session: aiohttp.ClientSession
-    _connector: aiohttp.TCPConnector
-    _resolver: aiohttp.AsyncResolver
+    http_session: UpstreamClient
 
     def __init__(self, *args, **kwargs) -> None:
         """Initialise bot with args passed through."""
@@ -49,8 +71,18 @@ class Obsidion(AutoShardedBot):
         self._i18n_cache = I18nManager(self)
         self._account_cache = AccountManager(self)
         self._guild_cache = GuildManager(self)
+        self._invalidation_listener: Optional[asyncio.Task] = None
+        self._player_store = PlayerStore(self)
+        self._player_lookups = cache.SingleFlight()
+        self._username_lookups: MicroBatcher[str, str] = MicroBatcher(
+            self._fetch_uuids, max_size=10, max_delay=0.01
+        )
 
         async def prefix_manager(bot, message: discord.Message) -> List[str]:
+            if not self._prefix_cache.index.could_match(message.content):
+                # No guild uses a prefix this could start with, so only a
+                # mention can make it a command and that needs no lookup.
+                return when_mentioned(bot, message)
             prefixes = await self._prefix_cache.get_prefixes(message.guild)
             return when_mentioned_or(*prefixes)(bot, message)
 
@@ -62,17 +94,13 @@ class Obsidion(AutoShardedBot):
 
         self.redis = await aioredis.create_redis_pool(str(get_settings().REDIS))
         self.db = await asyncpg.create_pool(str(get_settings().DB))
-        self._resolver = aiohttp.AsyncResolver()
-        # Use AF_INET as its socket family to prevent HTTPS related
-        # problems both locally and in production.
-        self._connector = aiohttp.TCPConnector(
-            resolver=self._resolver,
-            family=socket.AF_INET,
+        self._invalidation_listener = asyncio.create_task(
+            listen_for_invalidations(
+                self.redis, self.settings_managers, self._prefix_cache
+            )
         )
-
-        # Client.login() will call HTTPClient.static_login()
-        # which will create a session using this connector attribute.
-        self.http_session = aiohttp.ClientSession(connector=self._connector)
+        await self._preload_settings()
+        self.http_session = UpstreamClient(self.redis)
 
         # Load important cogs
         self.add_cog(Events(self))
@@ -96,6 +124,23 @@ class Obsidion(AutoShardedBot):
         if get_settings().BOTLIST_POSTING:
             self.load_extension("obsidion.cogs.botlist")
 
+    async def _preload_settings(self) -> None:
+        """Index prefixes and warm the settings cache before shards connect."""
+        await self._prefix_cache.load_index()
+        settings = get_settings()
+        warm_cache = settings.CACHE_WARMUP and await claim_warmup(self.redis)
+        if warm_cache or settings.GUILD_BLOOM_FILTER:
+            await self._guild_cache.preload(
+                warm_cache=warm_cache, bloom_filter=settings.GUILD_BLOOM_FILTER
+            )
+        if warm_cache:
+            await self._account_cache.preload()
+
+    @property
+    def settings_managers(self) -> Tuple[Any, ...]:
+        """All settings managers which keep an in-process cache."""
+        return (self._account_cache, self._guild_cache)
+
     async def start(self, *args, **kwargs):
         """
         Overridden start which ensures cog load and other
@@ -104,6 +149,16 @@ class Obsidion(AutoShardedBot):
         await self.pre_flight()
         return await super().start(*args, **kwargs)
 
+    async def invoke(self, ctx: commands.Context) -> None:
+        """Invoke a command, resolving the guild's locales only when there is one.
+
+        Messages which are not commands never need translating, so they skip
+        the locale lookups entirely.
+        """
+        if ctx.command is not None:
+            await set_contextual_locales_from_guild(self, ctx.guild)
+        await super().invoke(ctx)
+
     async def message_eligible_as_command(self, message: discord.Message) -> bool:
         """
         Runs through the things which apply globally about commands
@@ -185,6 +240,8 @@ class Obsidion(AutoShardedBot):
             self._shutdown_mode = ExitCodes.RESTART
 
         await self.close()
+        if self._invalidation_listener is not None:
+            self._invalidation_listener.cancel()
         if self.db is not None:
             await self.db.close()
         if self.redis is not None:
@@ -205,37 +262,229 @@ class Obsidion(AutoShardedBot):
             str: uuid of player
         """
         if username is None:
-            _uuid = await self._account_cache.get_account(user)
-            if _uuid is None:
-                raise PlayerNotExist()
-            uuid = str(_uuid)
+            uuid = await self._account_uuid(user)
         else:
-            username_key = f"username_{username}"
-            if await self.redis.exists(username_key):
-                uuid = str((await self.redis.get(username_key)).decode("UTF-8"))
-            else:
-                uuid = str(username)
-        data: Optional[Dict[str, Any]]
-        key = f"player_{str(uuid)}"
-        if await self.redis.exists(key):
-            data = json.loads(await self.redis.get(key))
-        else:
-            url = f"https://api.ashcon.app/mojang/v2/user/{str(uuid)}"
+            try:
+                uuid = str(uuid_lib.UUID(username))
+            except ValueError:
+                # The player API resolves usernames itself, so a name that is
+                # not known yet still only costs one request
+                uuid = await self._known_uuid(username) or username
+        data, refresh = cache.read_soft(await cache.get(self.redis, f"player_{uuid}"))
+        if data is MISSING:
+            data = await self._resolve_player(uuid)
+        elif refresh:
+            self._refresh_later(uuid)
+        if data is None:
+            raise PlayerNotExist()
+        return data
+
+    async def mojang_players(self, uuids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Look up several players by uuid at once.
+
+        Cached players are read with a single ``MGET``, the rest are fetched
+        concurrently with at most ``PLAYER_LOOKUP_CONCURRENCY`` requests
+        in flight.
+
+        Args:
+            uuids (List[str]): uuids of the players to look up
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: player data in the same order as
+            ``uuids``, ``None`` for players that do not exist
+        """
+        players = []
+        raw = await cache.get_many(self.redis, [f"player_{uuid}" for uuid in uuids])
+        for uuid, value in zip(uuids, raw):
+            data, refresh = cache.read_soft(value)
+            if data is not MISSING and refresh:
+                self._refresh_later(uuid)
+            players.append(data)
+        semaphore = asyncio.Semaphore(PLAYER_LOOKUP_CONCURRENCY)
+
+        async def fetch(uuid: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self._resolve_player(uuid)
+
+        missing = [i for i, data in enumerate(players) if data is MISSING]
+        fetched = await asyncio.gather(*(fetch(uuids[i]) for i in missing))
+        for i, data in zip(missing, fetched):
+            players[i] = data
+        return players
+
+    async def mojang_uuid(
+        self, user: discord.User, username: Optional[str] = None
+    ) -> str:
+        """Get the uuid of a player without fetching their profile.
+
+        Usernames that are not cached are resolved with Mojang's bulk
+        endpoint, names looked up at the same time share one request.
+
+        Args:
+            user (discord.User): user whose linked account is used if no
+                username is given
+            username (Optional[str]): username or uuid of the player
+
+        Raises:
+            PlayerNotExist: the player does not exist
+
+        Returns:
+            str: uuid of the player
+        """
+        if username is None:
+            return await self._account_uuid(user)
+        try:
+            return str(uuid_lib.UUID(username))
+        except ValueError:
+            pass
+        uuid = await self._known_uuid(username)
+        if uuid is not None:
+            return uuid
+        if not USERNAME_RE.match(username):
+            raise PlayerNotExist()
+        uuid = await self._username_lookups.submit(username.lower())
+        if uuid is None:
+            raise PlayerNotExist()
+        return uuid
+
+    async def _account_uuid(self, user: discord.User) -> str:
+        uuid = await self._account_cache.get_account(user)
+        if uuid is None:
+            raise PlayerNotExist()
+        return str(uuid)
+
+    async def _known_uuid(self, username: str) -> Optional[str]:
+        """Get the uuid of a username from Redis or Postgres.
+
+        Raises:
+            PlayerNotExist: the username was looked up recently and not found
+        """
+        cached = await cache.get(self.redis, _username_key(username))
+        if cached == UNKNOWN_USERNAME:
+            raise PlayerNotExist()
+        if cached is not None:
+            return cached.decode("UTF-8")
+        uuid = await self._player_store.get_uuid(username)
+        if uuid is not None:
+            await cache.put(self.redis, _username_key(username), uuid)
+        return uuid
+
+    async def _resolve_player(self, uuid: str) -> Optional[Dict[str, Any]]:
+        """Load a player that is not in Redis from Postgres or upstream."""
+        # Concurrent lookups of the same player share one load
+        key = uuid.lower().replace("-", "")
+        return await self._player_lookups.do(key, lambda: self._load_player(uuid))
+
+    async def _load_player(self, uuid: str) -> Optional[Dict[str, Any]]:
+        try:
+            stored = await self._player_store.get(str(uuid_lib.UUID(uuid)))
+        except ValueError:
+            stored = None
+        if stored is None:
+            return await self._fetch_player(uuid)
+        await self._cache_player(stored.data)
+        if stored.stale:
+            self._refresh_later(uuid)
+        return stored.data
+
+    def _refresh_later(self, uuid: str) -> None:
+        """Refresh a player in the background, at most once at a time."""
+        key = ("refresh", uuid.lower().replace("-", ""))
+        self._player_lookups.start(key, lambda: self._refresh_player(uuid))
+
+    async def _fetch_uuids(self, usernames: List[str]) -> Dict[str, str]:
+        """Resolve up to 10 usernames to uuids with one bulk request.
+
+        Raises:
+            PlayerNotExist: Mojang rejected the names
+            UpstreamUnavailable: Mojang could not be reached or is failing
+        """
+        url = "https://api.mojang.com/profiles/minecraft"
+        try:
+            async with self.http_session.post(url, json=usernames) as resp:
+                if resp.status == 429 or resp.status >= 500:
+                    raise UpstreamUnavailable("api.mojang.com")
+                if resp.status != 200:
+                    raise PlayerNotExist()
+                profiles = await resp.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise UpstreamUnavailable("api.mojang.com") from e
+        found = {
+            profile["name"].lower(): str(uuid_lib.UUID(profile["id"]))
+            for profile in profiles
+        }
+        tr = self.redis.multi_exec()
+        for username in usernames:
+            uuid = found.get(username.lower(), UNKNOWN_USERNAME)
+            tr.set(
+                _username_key(username), uuid, expire=cache.jittered(cache.DEFAULT_TTL)
+            )
+        await tr.execute()
+        return {
+            username: found[username.lower()]
+            for username in usernames
+            if username.lower() in found
+        }
+
+    async def _request_player(self, uuid: str) -> Optional[Dict[str, Any]]:
+        """Request a player, ``None`` only if the API says they do not exist.
+
+        Raises:
+            PlayerNotExist: the API rejected the username or uuid
+            UpstreamUnavailable: the API could not be reached or is failing
+        """
+        url = f"https://api.ashcon.app/mojang/v2/user/{uuid}"
+        try:
             async with self.http_session.get(url) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
-                else:
-                    data = None
-        if data is not None:
-            uuid = data["uuid"]
-        key = f"player_{uuid}"
-        await self.redis.set(key, json.dumps(data), expire=28800)
+                    return await resp.json()
+                if resp.status == 404:
+                    return None
+                if resp.status == 429 or resp.status >= 500:
+                    raise UpstreamUnavailable("api.ashcon.app")
+                raise PlayerNotExist()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise UpstreamUnavailable("api.ashcon.app") from e
+
+    async def _fetch_player(self, uuid: str) -> Optional[Dict[str, Any]]:
+        """Fetch a player from the upstream API and store the result."""
+        start = time.monotonic()
+        data = await self._request_player(uuid)
+        delta = time.monotonic() - start
         if data is None:
-            raise PlayerNotExist()
-        username_key = f"username_{data['username']}"
-        await self.redis.set(username_key, str(uuid), expire=28800)
+            if USERNAME_RE.match(uuid):
+                await cache.put(self.redis, _username_key(uuid), UNKNOWN_USERNAME)
+            else:
+                payload, expire = cache.soft_entry(None, cache.DEFAULT_TTL, delta=delta)
+                await self.redis.set(f"player_{uuid}", payload, expire=expire)
+        else:
+            await self._cache_player(data, delta)
+            await self._player_store.put(data)
         return data
 
+    async def _refresh_player(self, uuid: str) -> None:
+        """Replace a stale stored player, keeping it if the fetch fails."""
+        try:
+            start = time.monotonic()
+            data = await self._request_player(uuid)
+            if data is not None:
+                await self._cache_player(data, time.monotonic() - start)
+                await self._player_store.put(data)
+        except Exception:
+            log.warning("Failed to refresh player %s", uuid, exc_info=True)
+
+    async def _cache_player(self, data: Dict[str, Any], delta: float = 0.0) -> None:
+        payload, expire = cache.soft_entry(data, cache.DEFAULT_TTL, delta=delta)
+        tr = self.redis.multi_exec()
+        tr.set(f"player_{data['uuid']}", payload, expire=expire)
+        tr.set(_username_key(data["username"]), data["uuid"], expire=expire)
+        await tr.execute()
+
+
+def _username_key(username: str) -> str:
+    # Usernames are case insensitive, so every casing shares one key
+    return f"username_{username.lower()}"
+
 
 class ExitCodes(IntEnum):
     # This needs to be an int enum to be used
@@ -0,0 +1,257 @@
+"""Helpers for reading and writing the Redis cache.
+
+Reads are a single round trip and never write, callers only write on a
+miss.
+
+Soft entries carry their own freshness so they can outlive their TTL: a
+stale entry is still served while a single background task refreshes it.
+"""
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+import aioredis
+
+__all__ = [
+    "DEFAULT_TTL",
+    "MISSING",
+    "NEGATIVE_FIELD",
+    "NEGATIVE_TTL",
+    "get",
+    "get_json",
+    "get_many",
+    "get_hash",
+    "put",
+    "put_json",
+    "put_hash",
+    "jittered",
+    "soft_entry",
+    "read_soft",
+    "SingleFlight",
+    "SoftCache",
+]
+
+log = logging.getLogger("obsidion")
+
+T = TypeVar("T")
+
+DEFAULT_TTL = 28800
+# Negative entries record that the database has no row for a key. They are
+# overwritten by any write, the TTL only bounds changes made outside the bot.
+NEGATIVE_TTL = 86400
+NEGATIVE_FIELD = "__negative__"
+# TTLs are shortened by up to this fraction so keys written together do not
+# all expire together
+TTL_JITTER = 0.1
+# How eagerly soft entries are refreshed before they go stale, 0 disables it
+EARLY_REFRESH_BETA = 1.0
+
+MISSING = object()
+
+
+async def get(redis: aioredis.Redis, key: str) -> Optional[bytes]:
+    """Get a key, ``None`` if it is not cached."""
+    return await redis.get(key)
+
+
+async def get_json(redis: aioredis.Redis, key: str) -> Any:
+    """Get a JSON encoded key, returns ``MISSING`` if it is not cached."""
+    value = await get(redis, key)
+    if value is None:
+        return MISSING
+    return json.loads(value)
+
+
+async def get_many(redis: aioredis.Redis, keys: List[str]) -> List[Optional[bytes]]:
+    """Get several keys with one ``MGET``."""
+    if not keys:
+        return []
+    return await redis.mget(*keys)
+
+
+async def get_hash(redis: aioredis.Redis, key: str) -> Dict[str, str]:
+    """Get a whole hash, an empty dict means it is not cached."""
+    return await redis.hgetall(key, encoding="utf-8")
+
+
+async def put(
+    redis: aioredis.Redis, key: str, value: Any, ttl: Optional[int] = DEFAULT_TTL
+) -> None:
+    """Set a key, it will never expire if ``ttl`` is ``None``."""
+    await redis.set(key, value, expire=ttl or 0)
+
+
+async def put_json(
+    redis: aioredis.Redis, key: str, value: Any, ttl: Optional[int] = DEFAULT_TTL
+) -> None:
+    """Set a key to the JSON encoding of ``value``."""
+    await put(redis, key, json.dumps(value), ttl)
+
+
+async def put_hash(
+    redis: aioredis.Redis,
+    key: str,
+    mapping: Dict[str, str],
+    ttl: Optional[int] = DEFAULT_TTL,
+) -> None:
+    """Replace a whole hash in a single transaction."""
+    tr = redis.multi_exec()
+    tr.delete(key)
+    tr.hmset_dict(key, mapping)
+    if ttl:
+        tr.expire(key, ttl)
+    await tr.execute()
+
+
+def jittered(ttl: int) -> int:
+    """Shorten ``ttl`` by a random amount of up to ``TTL_JITTER``."""
+    return max(1, round(ttl * random.uniform(1 - TTL_JITTER, 1)))
+
+
+def soft_entry(
+    value: Any, ttl: int, *, stale_ttl: int = DEFAULT_TTL, delta: float = 0.0
+) -> Tuple[str, int]:
+    """Encode ``value`` as a soft entry.
+
+    Args:
+        value (Any): JSON serialisable value to cache
+        ttl (int): seconds the value is fresh for, before jitter
+        stale_ttl (int): seconds a stale value is still served for
+        delta (float): seconds it took to compute the value, slower values
+            are refreshed earlier
+
+    Returns:
+        Tuple[str, int]: the payload and the expiry to set it with
+    """
+    ttl = jittered(ttl)
+    entry = {"v": value, "f": time.time() + ttl, "d": delta}
+    return json.dumps(entry), ttl + stale_ttl
+
+
+def read_soft(raw: Optional[bytes]) -> Tuple[Any, bool]:
+    """Decode a soft entry.
+
+    Returns the value, ``MISSING`` if nothing usable is cached, and whether
+    the caller should refresh it.
+    """
+    if raw is None:
+        return MISSING, True
+    entry = json.loads(raw)
+    if not isinstance(entry, dict) or "f" not in entry:
+        # Written before the key held soft entries
+        return MISSING, True
+    # Probabilistic early expiration, each read has a chance of refreshing
+    # the entry that grows as it gets closer to going stale
+    gap = -entry["d"] * EARLY_REFRESH_BETA * math.log(1.0 - random.random())
+    return entry["v"], time.time() + gap >= entry["f"]
+
+
+class SingleFlight:
+    """Share a single in-flight call between concurrent callers of the same key.
+
+    The call runs as its own task, so a caller being cancelled does not
+    cancel it for the others waiting on it.
+    """
+
+    def __init__(self) -> None:
+        self.coalesced = 0
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def start(
+        self, key: Hashable, func: Callable[[], Awaitable[T]]
+    ) -> "asyncio.Future[T]":
+        """Start ``func()`` unless a call for ``key`` is already running."""
+        try:
+            call = self._calls[key]
+        except KeyError:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        return call
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Await ``func()``, or the call already running for ``key``."""
+        return await asyncio.shield(self.start(key, func))
+
+
+class SoftCache:
+    """Serve cached values past their TTL while one task refreshes them.
+
+    Parameters
+    ----------
+    stale_ttl : int
+        How long in seconds a stale value is still served for.
+    """
+
+    def __init__(self, *, stale_ttl: int = DEFAULT_TTL) -> None:
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._flight = SingleFlight()
+
+    async def get(
+        self,
+        redis: aioredis.Redis,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: int,
+    ) -> Any:
+        """Get ``key``, calling ``fetch`` to fill or refresh it."""
+        value, refresh = read_soft(await get(redis, key))
+        if value is MISSING:
+            self.misses += 1
+            return await self._flight.do(
+                key, lambda: self._fetch(redis, key, fetch, ttl)
+            )
+        self.hits += 1
+        if refresh:
+            self.stale += 1
+            self._flight.start(
+                ("refresh", key), lambda: self._refresh(redis, key, fetch, ttl)
+            )
+        return value
+
+    async def _fetch(
+        self,
+        redis: aioredis.Redis,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: int,
+    ) -> Any:
+        start = time.monotonic()
+        value = await fetch()
+        payload, expire = soft_entry(
+            value, ttl, stale_ttl=self.stale_ttl, delta=time.monotonic() - start
+        )
+        await redis.set(key, payload, expire=expire)
+        return value
+
+    async def _refresh(
+        self,
+        redis: aioredis.Redis,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: int,
+    ) -> None:
+        try:
+            await self._fetch(redis, key, fetch, ttl)
+        except Exception:
+            log.warning("Failed to refresh %s", key, exc_info=True)
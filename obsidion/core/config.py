@@ -20,6 +20,18 @@ class PlayerNotExist(Exception):
     pass
 
 
+class UpstreamUnavailable(Exception):
+    """An external API is failing and requests to it are being rejected."""
+
+    def __init__(self, service: str) -> None:
+        super().__init__(service)
+        self.service = service
+
+
+class UpstreamRateLimited(UpstreamUnavailable):
+    """The shared rate limit for an external API has been used up."""
+
+
 class Settings(BaseSettings):
     """Bot config settings."""
 
@@ -35,6 +47,8 @@ class Settings(BaseSettings):
     COLOR: Color = Color("0x00FF00")
     LOGLEVEL: Optional[str] = "INFO"
     BOTLIST_POSTING: bool = False
+    GUILD_BLOOM_FILTER: bool = False
+    CACHE_WARMUP: bool = True
     DBL_TOKEN: Optional[str]
     DISCORDBOTLIST_TOKEN: Optional[str]
     BOTSFORDISCORD_TOKEN: Optional[str]
@@ -343,6 +343,54 @@ class Core(commands.Cog):
         else:
             await ctx.send(_("No exception has occurred yet."))
 
+    @commands.command()
+    @commands.is_owner()
+    async def cachestats(self, ctx: commands.Context) -> None:
+        """Shows hit and miss counters for the in-process caches."""
+        lines = []
+        for manager in self.bot.settings_managers:
+            cache = manager._local
+            lookups = cache.hits + cache.misses
+            ratio = cache.hits / lookups * 100 if lookups else 0.0
+            lines.append(
+                f"{type(manager).__name__}: {cache.hits} hits, {cache.misses} "
+                f"misses ({ratio:.1f}%), {len(cache)} entries"
+            )
+        lookups = self.bot._player_lookups
+        lines.append(
+            f"Player lookups: {lookups.coalesced} coalesced, {len(lookups)} in flight"
+        )
+        batcher = self.bot._username_lookups
+        lines.append(
+            f"Username lookups: {batcher.keys} names in {batcher.batches} requests"
+        )
+        await ctx.send(box("\n".join(lines)))
+
+    @commands.command()
+    @commands.is_owner()
+    async def upstreamstats(self, ctx: commands.Context) -> None:
+        """Shows latency, error and circuit breaker state for each upstream host."""
+        lines = []
+        for host, stats in sorted(self.bot.http_session.stats.items()):
+            latency = stats.latency
+            lines.append(
+                f"{host}: {latency.count} requests, "
+                f"p50 <= {latency.quantile(0.5) * 1000:.0f}ms, "
+                f"p95 <= {latency.quantile(0.95) * 1000:.0f}ms, "
+                f"{stats.errors} errors, {stats.retries} retries"
+            )
+        for host, bucket in sorted(self.bot.http_session.buckets.items()):
+            lines.append(
+                f"{host} budget: {bucket.remaining:.1f}/{bucket.capacity} tokens, "
+                f"{bucket.waited} waited, {bucket.rejected} rejected"
+            )
+        for host, breaker in sorted(self.bot.http_session.breakers.items()):
+            lines.append(
+                f"{host} circuit: {breaker.state}, opened {breaker.trips} times, "
+                f"{breaker.rejected} rejected"
+            )
+        await ctx.send(box("\n".join(lines) or _("No upstream requests yet.")))
+
     @cog_ext.cog_slash(name="help")
     async def slash_help(self, ctx: SlashContext, command=None) -> None:  # noqa: C901
         await ctx.defer()
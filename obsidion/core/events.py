@@ -6,10 +6,11 @@ import discord
 from discord.ext import commands
 from obsidion.core.config import get_settings
 from obsidion.core.config import PlayerNotExist
+from obsidion.core.config import UpstreamRateLimited
+from obsidion.core.config import UpstreamUnavailable
 from obsidion.core.i18n import cog_i18n
 from obsidion.core.i18n import Translator
 
-from .i18n import set_contextual_locales_from_guild
 from .utils.chat_formatting import box
 from .utils.chat_formatting import format_perms_list
 from .utils.chat_formatting import humanize_timedelta
@@ -46,10 +47,6 @@ class Events(commands.Cog):
             )
             self.bot._invite = url
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        await set_contextual_locales_from_guild(self.bot, message.guild)
-
     @commands.Cog.listener("on_ready")
     async def on_ready(self):
         if self.bot.uptime is not None:
@@ -59,8 +56,28 @@ class Events(commands.Cog):
 
     @commands.Cog.listener("on_slash_command_error")
     async def on_slash_command_error(self, ctx, ex) -> None:
+        if isinstance(ex, UpstreamUnavailable):
+            await self.send_upstream_unavailable(ctx, ex)
+            return
         await self.handle_check_failure(ctx, ex)
 
+    @staticmethod
+    async def send_upstream_unavailable(ctx, e: UpstreamUnavailable) -> None:
+        if isinstance(e, UpstreamRateLimited):
+            await ctx.send(
+                _(
+                    "Too many requests are being made to `{service}`, please try "
+                    "again in a few seconds."
+                ).format(service=e.service)
+            )
+            return
+        await ctx.send(
+            _(
+                "`{service}` is not responding right now, please try again in a "
+                "few minutes."
+            ).format(service=e.service)
+        )
+
     @staticmethod
     async def handle_check_failure(ctx: commands.Context, e) -> None:
         """
@@ -210,6 +227,9 @@ class Events(commands.Cog):
                     ).format(author=ctx.message.author.mention)
                 )
                 return
+            elif isinstance(error.original, UpstreamUnavailable):
+                await self.send_upstream_unavailable(ctx, error.original)
+                return
             log.exception(
                 "Exception in command '{}'".format(ctx.command.qualified_name),
                 exc_info=error.original,
@@ -5,11 +5,14 @@ import functools
 import io
 import logging
 import os
+import struct
 from contextvars import ContextVar
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Mapping
 from typing import Optional
 from typing import Union
 
@@ -57,12 +60,10 @@ def get_locale() -> str:
 def set_locale(locale: str) -> None:
     global _current_locale
     _current_locale = ContextVar("_current_locale", default=locale)
-    reload_locales()
 
 
 def set_contextual_locale(locale: str) -> None:
     _current_locale.set(locale)
-    reload_locales()
 
 
 def get_regional_format() -> str:
@@ -83,6 +84,7 @@ def set_contextual_regional_format(regional_format: Optional[str]) -> None:
 
 
 def reload_locales() -> None:
+    """Drop every loaded catalog so they are read again on next use."""
     for translator in _translators:
         translator.load_translations()
 
@@ -147,7 +149,7 @@ async def set_contextual_locales_from_guild(
     set_contextual_regional_format(regional_format)
 
 
-def _parse(translation_file: io.TextIOWrapper) -> Dict[str, Dict[str, str]]:
+def _parse(translation_file: io.TextIOWrapper) -> Dict[str, str]:
     """
     Custom gettext parsing of translation files.
 
@@ -160,27 +162,33 @@ def _parse(translation_file: io.TextIOWrapper) -> Dict[str, Dict[str, str]]:
     -------
     Dict[str, str]
         A dict mapping the original strings to their translations. Empty
-        translated strings are omitted.
+        translated strings, fuzzy translations and the metadata entry are
+        omitted, as ``msgfmt`` omits them from ``.mo`` files.
 
     """
     step = None
     untranslated = ""
     translated = ""
-    translations: Dict[str, Dict[str, str]] = {}
-    locale = get_locale()
+    fuzzy = False
+    next_fuzzy = False
+    translations: Dict[str, str] = {}
 
-    translations[locale] = {}
+    def store() -> None:
+        if step is IN_MSGSTR and translated and untranslated and not fuzzy:
+            translations[_unescape(untranslated)] = _unescape(translated)
 
     for line in translation_file:
         line = line.strip()
 
-        if line.startswith(MSGID):
-            # New msgid
-            if step is IN_MSGSTR and translated:
-                # Store the last translation
-                translations[locale][_unescape(untranslated)] = _unescape(translated)
+        if line.startswith("#,"):
+            # Flags of the next entry
+            next_fuzzy = "fuzzy" in line[2:].replace(" ", "").split(",")
+        elif line.startswith(MSGID):
+            # New msgid, store the last translation
+            store()
             step = IN_MSGID
             untranslated = line[len(MSGID) : -1]
+            fuzzy, next_fuzzy = next_fuzzy, False
         elif line.startswith('"') and line.endswith('"'):
             if step is IN_MSGID:
                 # Line continuing on from msgid
@@ -193,9 +201,41 @@ def _parse(translation_file: io.TextIOWrapper) -> Dict[str, Dict[str, str]]:
             step = IN_MSGSTR
             translated = line[len(MSGSTR) : -1]
 
-    if step is IN_MSGSTR and translated:
-        # Store the final translation
-        translations[locale][_unescape(untranslated)] = _unescape(translated)
+    # Store the final translation
+    store()
+    return translations
+
+
+def _read_mo(data: bytes) -> Dict[str, str]:
+    """
+    Read a compiled gettext catalog.
+
+    Parameters
+    ----------
+    data : bytes
+        The contents of a ``.mo`` file.
+
+    Returns
+    -------
+    Dict[str, str]
+        A dict mapping the original strings to their translations.
+
+    """
+    order = "<" if struct.unpack("<I", data[:4])[0] == 0x950412DE else ">"
+    count, ids_offset, strs_offset = struct.unpack_from(f"{order}3I", data, 8)
+    translations: Dict[str, str] = {}
+    for index in range(count):
+        id_length, id_offset = struct.unpack_from(
+            f"{order}2I", data, ids_offset + index * 8
+        )
+        str_length, str_offset = struct.unpack_from(
+            f"{order}2I", data, strs_offset + index * 8
+        )
+        untranslated = data[id_offset : id_offset + id_length].decode("utf-8")
+        if untranslated:  # The empty msgid holds the catalog's metadata
+            translations[untranslated] = data[
+                str_offset : str_offset + str_length
+            ].decode("utf-8")
     return translations
 
 
@@ -208,7 +248,9 @@ def _unescape(string):
     return string
 
 
-def get_locale_path(cog_folder: Path, extension: str) -> Path:
+def get_locale_path(
+    cog_folder: Path, extension: str, locale: Optional[str] = None
+) -> Path:
     """
     Gets the folder path containing localization files.
 
@@ -216,10 +258,17 @@ def get_locale_path(cog_folder: Path, extension: str) -> Path:
         The cog folder that we want localizations for.
     :param str extension:
         Extension of localization files.
+    :param Optional[str] locale:
+        The locale to get the file for, defaults to the current locale.
     :return:
         Path of possible localization file, it may not exist.
     """
-    return cog_folder / "locales" / "{}.{}".format(get_locale(), extension)
+    if locale is None:
+        locale = get_locale()
+    return cog_folder / "locales" / "{}.{}".format(locale, extension)
+
+
+_EMPTY_CATALOG: Mapping[str, str] = MappingProxyType({})
 
 
 class Translator:
@@ -240,51 +289,56 @@ class Translator:
         """
         self.cog_folder = Path(file_location).resolve().parent
         self.cog_name = name
-        self.translations: Dict[str, Dict[str, str]] = {}
+        # Each locale's catalog is read once on first use and never changes,
+        # so switching locale is only a ContextVar lookup.
+        self.translations: Dict[str, Mapping[str, str]] = {}
 
         _translators.append(self)
 
-        self.load_translations()
-
     def __call__(self, untranslated: str) -> str:
         """Translate the given string.
 
         This will look for the string in the translator's :code:`.pot` file,
         with respect to the current locale.
         """
-        locale = get_locale()
+        locale = _current_locale.get()
         try:
-            return self.translations[locale][untranslated]
+            catalog = self.translations[locale]
         except KeyError:
-            return untranslated
+            catalog = self._load_catalog(locale)
+        return catalog.get(untranslated, untranslated)
 
     def load_translations(self):
         """
-        Loads the current translations.
+        Drops the loaded translations, they are loaded again when next used.
         """
-        locale = get_locale()
-
-        if locale.lower() == "en-us":
-            # Obsidion is written in en-US, no point in loading it
-            return
-        if locale in self.translations:
-            # Locales cannot be loaded twice as they have an entry in
-            # self.translations
-            return
-
-        locale_path = get_locale_path(self.cog_folder, "po")
-        with contextlib.suppress(IOError, FileNotFoundError):
-            with locale_path.open(encoding="utf-8") as file:
-                self._parse(file)
-
-    def _parse(self, translation_file):
-        self.translations.update(_parse(translation_file))
-
-    def _add_translation(self, untranslated, translated):
-        untranslated = _unescape(untranslated)
-        translated = _unescape(translated)
-        if translated:
-            self.translations[untranslated] = translated
+        self.translations = {}
+
+    def _load_catalog(self, locale: str) -> Mapping[str, str]:
+        catalog = _EMPTY_CATALOG
+        # Obsidion is written in en-US, no point in loading it
+        if locale.lower() != "en-us":
+            with contextlib.suppress(IOError, FileNotFoundError):
+                catalog = MappingProxyType(self._read_catalog(locale))
+        self.translations[locale] = catalog
+        return catalog
+
+    def _read_catalog(self, locale: str) -> Dict[str, str]:
+        """Read the compiled catalog, or parse the ``.po`` file if it is newer.
+
+        Catalogs are compiled when building the image, in development the
+        ``.po`` files are used directly.
+        """
+        po_path = get_locale_path(self.cog_folder, "po", locale)
+        mo_path = get_locale_path(self.cog_folder, "mo", locale)
+        try:
+            compiled = mo_path.stat().st_mtime >= po_path.stat().st_mtime
+        except FileNotFoundError:
+            compiled = mo_path.exists()
+        if compiled:
+            return _read_mo(mo_path.read_bytes())
+        with po_path.open(encoding="utf-8") as file:
+            return _parse(file)
 
 
 @functools.lru_cache()
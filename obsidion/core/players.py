@@ -0,0 +1,69 @@
+"""Durable store for Minecraft player profiles.
+
+Redis only holds profiles for ``cache.DEFAULT_TTL``, the ``player`` table
+keeps them so a Redis miss does not have to go to the upstream API.
+"""
+import datetime
+import json
+from typing import Any
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+
+import asyncpg
+
+# Profiles older than this are still served but refreshed in the background
+PLAYER_STALE_AFTER = datetime.timedelta(days=1)
+
+_PLAYER_UPSERT = (
+    "INSERT INTO player (uuid, username, data, fetched_at) "
+    "VALUES ($1, $2, $3, now()) "
+    "ON CONFLICT (uuid) DO UPDATE SET username = EXCLUDED.username, "
+    "data = EXCLUDED.data, fetched_at = EXCLUDED.fetched_at"
+)
+
+
+class StoredPlayer(NamedTuple):
+    """A player profile read from the ``player`` table."""
+
+    data: Dict[str, Any]
+    fetched_at: datetime.datetime
+
+    @property
+    def stale(self) -> bool:
+        """Whether the profile should be refreshed from upstream."""
+        age = datetime.datetime.now(datetime.timezone.utc) - self.fetched_at
+        return age > PLAYER_STALE_AFTER
+
+    @classmethod
+    def from_record(cls, record: asyncpg.Record) -> "StoredPlayer":
+        return cls(json.loads(record["data"]), record["fetched_at"])
+
+
+class PlayerStore:
+    """Reads and writes player profiles in Postgres."""
+
+    def __init__(self, bot) -> None:
+        self._bot = bot
+
+    async def get(self, uuid: str) -> Optional[StoredPlayer]:
+        """Get a stored profile by uuid."""
+        record = await self._bot.db.fetchrow(
+            "SELECT data, fetched_at FROM player WHERE uuid = $1", uuid
+        )
+        return StoredPlayer.from_record(record) if record else None
+
+    async def get_uuid(self, username: str) -> Optional[str]:
+        """Get the uuid last seen using ``username``, ignoring case."""
+        uuid = await self._bot.db.fetchval(
+            "SELECT uuid FROM player WHERE lower(username) = lower($1) "
+            "ORDER BY fetched_at DESC LIMIT 1",
+            username,
+        )
+        return str(uuid) if uuid else None
+
+    async def put(self, data: Dict[str, Any]) -> None:
+        """Store a profile fetched from upstream."""
+        await self._bot.db.execute(
+            _PLAYER_UPSERT, data["uuid"], data["username"], json.dumps(data)
+        )
@@ -0,0 +1,111 @@
+"""Token buckets shared by every shard process through Redis.
+
+Each bucket refills at ``rate`` tokens a second up to ``capacity``. Taking a
+token is a single Lua script so concurrent processes cannot overspend it.
+"""
+import asyncio
+import hashlib
+import time
+from typing import List
+from typing import Tuple
+
+import aioredis
+
+from .config import UpstreamRateLimited
+
+# Returns whether a token was taken, the tokens left and the seconds until
+# one will be available. Floats are returned as strings since Redis would
+# truncate them to integers. The time is read from Redis so clock skew between
+# processes cannot refill the bucket early.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local taken = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    taken = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call("HMSET", KEYS[1], "tokens", tokens, "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {taken, tostring(tokens), tostring(wait)}
+"""
+TOKEN_BUCKET_SHA = hashlib.sha1(TOKEN_BUCKET_SCRIPT.encode()).hexdigest()
+
+
+class TokenBucket:
+    """A rate limit on calls to one upstream, shared between processes.
+
+    Parameters
+    ----------
+    redis : aioredis.Redis
+        Where the bucket is kept.
+    name : str
+        Name of the upstream the bucket limits.
+    rate : float
+        Tokens added each second.
+    capacity : int
+        Most tokens the bucket holds, the size of the largest burst.
+    max_wait : float
+        Longest time in seconds a call waits for a token.
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        name: str,
+        rate: float,
+        capacity: int,
+        max_wait: float = 2.0,
+    ) -> None:
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self.remaining = float(capacity)
+        self.waited = 0
+        self.rejected = 0
+        self._redis = redis
+        self._key = f"ratelimit_{name}"
+
+    async def _take(self) -> Tuple[bool, float]:
+        args: List[float] = [self.rate, self.capacity]
+        try:
+            reply = await self._redis.evalsha(
+                TOKEN_BUCKET_SHA, keys=[self._key], args=args
+            )
+        except aioredis.ReplyError as e:
+            if not str(e).startswith("NOSCRIPT"):
+                raise
+            reply = await self._redis.eval(
+                TOKEN_BUCKET_SCRIPT, keys=[self._key], args=args
+            )
+        taken, tokens, wait = reply
+        self.remaining = float(tokens)
+        return bool(taken), float(wait)
+
+    async def acquire(self) -> None:
+        """Take a token, waiting up to ``max_wait`` seconds for one.
+
+        Raises:
+            UpstreamRateLimited: no token became available in time
+        """
+        deadline = time.monotonic() + self.max_wait
+        taken, wait = await self._take()
+        if taken:
+            return
+        self.waited += 1
+        while not taken:
+            if time.monotonic() + wait > deadline:
+                self.rejected += 1
+                raise UpstreamRateLimited(self.name)
+            await asyncio.sleep(wait)
+            taken, wait = await self._take()
@@ -1,60 +1,315 @@
+import asyncio
+import itertools
 import json
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import AsyncIterator
 from typing import Dict
+from typing import Iterable
 from typing import List
+from typing import NamedTuple
 from typing import Optional
+from typing import Set
+from typing import Tuple
 from typing import Union
 from uuid import UUID
 
+import aioredis
+import asyncpg
 import discord
 
+from . import cache
+from .cache import MISSING
 from .config import get_settings
+from .utils.bloom import BloomFilter
+
+log = logging.getLogger("obsidion")
+
+# Redis pub/sub channel used to tell every shard process to drop a stale key
+INVALIDATION_CHANNEL = "obsidion:settings:invalidate"
+# Every newly set prefix is published so all shards can index it
+PREFIX_CHANNEL = "obsidion:settings:prefix"
+# Seconds to wait before subscribing again after losing the subscription
+RESUBSCRIBE_DELAY = 5.0
+
+# Startup warm-up streams the settings tables into Redis in batches
+WARMUP_BATCH = 1000
+WARMUP_LOG_EVERY = 50000
+WARMUP_LOCK = "settings_warmup"
+WARMUP_LOCK_TTL = 600
+# Writes a warmed guild hash unless a live process already cached the guild,
+# whose copy may be newer than the warm-up's snapshot of the table
+WARMUP_HASH_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    redis.call("HSET", KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call("EXPIRE", KEYS[1], ARGV[1])
+return 1
+"""
+
+
+class LocalCache:
+    """Bounded in-process LRU cache where every entry expires after ``ttl``."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        """Get a value from the cache, returns ``MISSING`` if not cached."""
+        try:
+            expires, value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return MISSING
+        if expires < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class GuildSettings(NamedTuple):
+    """Settings for a single guild, mirrors a row of the ``guild`` table."""
+
+    prefix: Optional[str] = None
+    locale: Optional[str] = None
+    regional: Optional[str] = None
+    server: Optional[str] = None
+    news: Optional[Dict[str, Optional[int]]] = None
+
+    @classmethod
+    def from_record(cls, record: Optional[asyncpg.Record]) -> "GuildSettings":
+        """Build the settings from a ``guild`` row, ``None`` gives the defaults."""
+        if record is None:
+            return cls()
+        news = record["news"]
+        return cls(
+            prefix=record["prefix"],
+            locale=record["locale"],
+            regional=record["regional"],
+            server=record["server"],
+            news=json.loads(news) if news is not None else None,
+        )
+
+    @classmethod
+    def from_hash(cls, data: Dict[str, str]) -> "GuildSettings":
+        """Build the settings from a Redis hash written by `to_hash`."""
+        return cls(*(json.loads(data[field]) for field in cls._fields))
+
+    def to_hash(self) -> Dict[str, str]:
+        """Serialise the settings to a Redis hash, every field is JSON."""
+        return {field: json.dumps(getattr(self, field)) for field in self._fields}
+
+
+DEFAULT_GUILD_SETTINGS = GuildSettings()
+
+# Settings writes are a single statement each, asyncpg prepares and caches
+# them per connection so only the first use on a connection is parsed.
+_GUILD_UPSERT = {
+    field: (
+        f"INSERT INTO guild (id, {field}) VALUES ($1, $2) "  # noqa: S608
+        f"ON CONFLICT (id) DO UPDATE SET {field} = EXCLUDED.{field} RETURNING *"
+    )
+    for field in GuildSettings._fields
+}
+_ACCOUNT_UPSERT = (
+    "INSERT INTO account (id, uuid) VALUES ($1, $2) "
+    "ON CONFLICT (id) DO UPDATE SET uuid = EXCLUDED.uuid"
+)
+
+
+class _SettingsManager:
+    """Base for the settings managers, owns the in-process cache layer."""
+
+    def __init__(self, bot) -> None:
+        self._bot = bot
+        self._local = LocalCache()
+
+    async def _stream(self, query: str) -> AsyncIterator[List[asyncpg.Record]]:
+        """Stream the rows of a query with a cursor in batches."""
+        async with self._bot.db.acquire() as conn:
+            async with conn.transaction():
+                batch = []
+                async for record in conn.cursor(query, prefetch=WARMUP_BATCH):
+                    batch.append(record)
+                    if len(batch) == WARMUP_BATCH:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+
+    @staticmethod
+    def _log_progress(table: str, rows: int, batch: int) -> int:
+        if (rows + batch) // WARMUP_LOG_EVERY > rows // WARMUP_LOG_EVERY:
+            log.info("Preloading %s table, %d rows so far", table, rows + batch)
+        return rows + batch
+
+    def _evict(self, key: str) -> None:
+        """Called for every key invalidated by any shard, including this one."""
+        self._local.invalidate(key)
+
+    def _missed_invalidations(self) -> None:
+        """Called when invalidations from other shards may have been lost."""
+        self._local.clear()
+
+    def _invalidate(self, tr: aioredis.commands.MultiExec, key: str) -> None:
+        """Drop a key from this process and queue telling the other shards."""
+        self._evict(key)
+        tr.publish(INVALIDATION_CHANNEL, key)
+
+
+async def claim_warmup(redis: aioredis.Redis) -> bool:
+    """Claim the cache warm-up so only one process does it after a deploy."""
+    return await redis.set(
+        WARMUP_LOCK, "1", expire=WARMUP_LOCK_TTL, exist=redis.SET_IF_NOT_EXIST
+    )
+
+
+def _warmup_ttl() -> int:
+    # Spread the expiry of warmed keys so they do not all expire at once
+    return cache.DEFAULT_TTL + random.randrange(cache.DEFAULT_TTL // 4)
+
+
+async def listen_for_invalidations(
+    redis: aioredis.Redis,
+    managers: Iterable[_SettingsManager],
+    prefixes: "PrefixManager",
+) -> None:
+    """Apply the invalidations and new prefixes published by any shard.
+
+    If the subscription is lost it is made again. Whatever was published in
+    between is unknown, so the local caches are dropped both when it is lost
+    and once it is back, and the prefix index is reloaded.
+    """
+    managers = tuple(managers)
+    resubscribed = False
+    while True:
+        try:
+            await _apply_invalidations(redis, managers, prefixes, resubscribed)
+            log.warning("Settings invalidation subscription closed")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.warning("Settings invalidation listener failed", exc_info=True)
+        if redis.closed:
+            return
+        for manager in managers:
+            manager._missed_invalidations()
+        resubscribed = True
+        await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+
+async def _apply_invalidations(
+    redis: aioredis.Redis,
+    managers: Tuple[_SettingsManager, ...],
+    prefixes: "PrefixManager",
+    resubscribed: bool,
+) -> None:
+    """Subscribe and apply what is published until the subscription ends."""
+    invalidations, new_prefixes = await redis.subscribe(
+        INVALIDATION_CHANNEL, PREFIX_CHANNEL
+    )
+
+    async def evict() -> None:
+        async for key in invalidations.iter(encoding="utf-8"):
+            for manager in managers:
+                manager._evict(key)
+
+    async def index() -> None:
+        async for prefix in new_prefixes.iter(encoding="utf-8"):
+            prefixes.index.add(prefix)
+
+    try:
+        if resubscribed:
+            for manager in managers:
+                manager._missed_invalidations()
+            await prefixes.load_index()
+            log.info("Resubscribed to settings invalidations")
+        await asyncio.gather(evict(), index())
+    finally:
+        if not redis.closed:
+            try:
+                await redis.unsubscribe(INVALIDATION_CHANNEL, PREFIX_CHANNEL)
+            except Exception:
+                log.debug("Failed to unsubscribe", exc_info=True)
+
+
+class PrefixIndex:
+    """Every prefix used by any guild, indexed by its first character.
+
+    Lets a message which cannot start with any prefix be rejected before
+    looking up its guild's settings.
+    """
+
+    def __init__(self) -> None:
+        self._by_first_char: Dict[str, Set[str]] = {}
+        self.add(get_settings().DEFAULT_PREFIX)
+
+    def add(self, prefix: str) -> None:
+        if prefix:
+            self._by_first_char.setdefault(prefix[0], set()).add(prefix)
+
+    def could_match(self, content: str) -> bool:
+        """Whether ``content`` starts with any prefix in use."""
+        if not content:
+            return False
+        return any(
+            content.startswith(prefix)
+            for prefix in self._by_first_char.get(content[0], ())
+        )
 
 
 class PrefixManager:
     def __init__(self, bot) -> None:
         self._bot = bot
+        self.index = PrefixIndex()
+
+    async def load_index(self) -> None:
+        """Index every prefix currently set by a guild."""
+        for record in await self._bot.db.fetch(
+            "SELECT DISTINCT prefix FROM guild WHERE prefix IS NOT NULL"
+        ):
+            self.index.add(record["prefix"])
 
     async def get_prefixes(self, guild: Optional[discord.Guild] = None) -> List[str]:
-        gid: Optional[int] = guild.id if guild else None
-        if gid is None:
+        if guild is None:
             return [get_settings().DEFAULT_PREFIX]
-
-        key = f"prefix_{gid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            prefix = (await self._bot.redis.get(key)).decode("UTF-8")
-        else:
-            db_prefix = await self._bot.db.fetchval(
-                "SELECT prefix FROM guild WHERE id = $1", gid
-            )
-            if db_prefix:
-                prefix = db_prefix
-            else:
-                prefix = get_settings().DEFAULT_PREFIX
-        await self._bot.redis.set(key, prefix, expire=28800)
-        return [str(prefix)]
+        settings = await self._bot._guild_cache.get_settings(guild)
+        return [settings.prefix or get_settings().DEFAULT_PREFIX]
 
     async def set_prefixes(
         self,
         guild: discord.Guild,
         prefix: Optional[str] = None,
     ) -> None:
-        gid = guild.id
-
-        key = f"prefix_{gid}"
-        if prefix is None:
-            prefix = get_settings().DEFAULT_PREFIX
-        elif await self._bot.db.fetch("SELECT prefix FROM guild WHERE id = $1", gid):
-            await self._bot.db.execute(
-                "UPDATE guild SET prefix = $1 WHERE id = $2", prefix, gid
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO guild (id, prefix) VALUES ($1, $2)",
-                gid,
-                prefix,
-            )
-        await self._bot.redis.set(key, prefix, expire=28800)
+        await self._bot._guild_cache.update(guild, "prefix", prefix)
 
 
 class I18nManager:
@@ -65,39 +320,12 @@ class I18nManager:
         """Get the guild locale from the cache"""
         if not guild:
             return "en-US"
-        gid = guild.id
-        key = f"locale_{gid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            locale = (await self._bot.redis.get(key)).decode("UTF-8")
-        else:
-            db_locale = await self._bot.db.fetchval(
-                "SELECT locale FROM guild WHERE id = $1", gid
-            )
-            if db_locale:
-                locale = db_locale
-            else:
-                locale = "en-US"
-        await self._bot.redis.set(key, locale, expire=28800)
-
-        return locale
+        settings = await self._bot._guild_cache.get_settings(guild)
+        return settings.locale or "en-US"
 
     async def set_locale(self, guild: discord.Guild, locale: Union[str, None]) -> None:
         """Set the locale in the config and cache"""
-        gid = guild.id
-
-        key = f"locale_{gid}"
-        if await self._bot.db.fetch("SELECT locale FROM guild WHERE id = $1", gid):
-            await self._bot.db.execute(
-                "UPDATE guild SET locale = $1 WHERE id = $2", locale, gid
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO guild (id, locale) VALUES ($1, $2)",
-                gid,
-                locale,
-            )
-        await self._bot.redis.set(key, locale, expire=28800)
+        await self._bot._guild_cache.update(guild, "locale", locale)
 
     async def get_regional_format(
         self, guild: Union[discord.Guild, None]
@@ -105,62 +333,61 @@ class I18nManager:
         """Get the regional format from the cache"""
         if not guild:
             return "en-US"
-        gid = guild.id
-        key = f"regional_{gid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            regional = (await self._bot.redis.get(key)).decode("UTF-8")
-        else:
-            db_regional = await self._bot.db.fetchval(
-                "SELECT regional FROM guild WHERE id = $1", gid
-            )
-            if db_regional:
-                regional = db_regional
-            else:
-                regional = "en-US"
-        await self._bot.redis.set(key, regional, expire=28800)
-
-        return regional
+        settings = await self._bot._guild_cache.get_settings(guild)
+        return settings.regional or "en-US"
 
     async def set_regional_format(
         self, guild: discord.Guild, regional_format: Union[str, None]
     ) -> None:
         """Set the regional format in the config and cache"""
-        gid = guild.id
-
-        key = f"regional_{gid}"
-        if await self._bot.db.fetch("SELECT regional FROM guild WHERE id = $1", gid):
-            await self._bot.db.execute(
-                "UPDATE guild SET regional = $1 WHERE id = $2", regional_format, gid
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO guild (id, regional) VALUES ($1, $2)",
-                gid,
-                regional_format,
-            )
-        await self._bot.redis.set(key, regional_format, expire=28800)
+        await self._bot._guild_cache.update(guild, "regional", regional_format)
 
 
-class AccountManager:
-    def __init__(self, bot):
-        self._bot = bot
+class AccountManager(_SettingsManager):
+    async def preload(self) -> None:
+        """Stream the account table into Redis at startup."""
+        start = time.perf_counter()
+        rows = 0
+        async for batch in self._stream("SELECT id, uuid FROM account"):
+            pipe = self._bot.redis.pipeline()
+            for record in batch:
+                if record["uuid"] is None:
+                    value, ttl = None, cache.NEGATIVE_TTL
+                else:
+                    value, ttl = str(record["uuid"]), _warmup_ttl()
+                # Only fill gaps, a live process may have cached a newer value
+                pipe.set(
+                    f"account_{record['id']}",
+                    json.dumps(value),
+                    expire=ttl,
+                    exist=self._bot.redis.SET_IF_NOT_EXIST,
+                )
+            await pipe.execute()
+            rows = self._log_progress("account", rows, len(batch))
+        log.info(
+            "Preloaded %d account rows in %.2fs", rows, time.perf_counter() - start
+        )
 
     async def get_account(self, user: discord.User) -> Union[UUID, None]:
         uid = user.id
         key = f"account_{uid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            uuid = json.loads(await self._bot.redis.get(key))
-            if uuid == "None":
-                uuid = None
-            if uuid is not None:
-                uuid = UUID(uuid)
-        else:
+        cached = self._local.get(key)
+        if cached is not MISSING:
+            return cached
+        value = await cache.get_json(self._bot.redis, key)
+        if value is MISSING:
             uuid = await self._bot.db.fetchval(
                 "SELECT uuid FROM account WHERE id = $1", uid
             )
-        await self._bot.redis.set(key, json.dumps(str(uuid)), expire=28800)
+            if uuid is None:
+                await cache.put_json(self._bot.redis, key, None, ttl=cache.NEGATIVE_TTL)
+            else:
+                await cache.put_json(self._bot.redis, key, str(uuid))
+        elif value is None or value == "None":
+            uuid = None
+        else:
+            uuid = UUID(value)
+        self._local.set(key, uuid)
         return uuid
 
     async def set_account(
@@ -168,84 +395,137 @@ class AccountManager:
     ) -> None:
         uid = user.id
         key = f"account_{uid}"
-        if await self._bot.db.fetch("SELECT uuid FROM account WHERE id = $1", uid):
-            await self._bot.db.execute(
-                "UPDATE account SET uuid = $1 WHERE id = $2",
-                uuid,
-                uid,
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO account (id, uuid) VALUES ($1, $2)",
-                uid,
-                uuid,
-            )
-        await self._bot.redis.set(key, json.dumps(uuid), expire=28800)
+        value = str(uuid) if uuid is not None else None
+        await self._bot.db.execute(_ACCOUNT_UPSERT, uid, value)
+        tr = self._bot.redis.multi_exec()
+        tr.set(
+            key,
+            json.dumps(value),
+            expire=cache.DEFAULT_TTL if value is not None else cache.NEGATIVE_TTL,
+        )
+        self._invalidate(tr, key)
+        await tr.execute()
 
 
-class GuildManager:
+class GuildManager(_SettingsManager):
     def __init__(self, bot) -> None:
-        self._bot = bot
+        super().__init__(bot)
+        self._bloom: Optional[BloomFilter] = None
+        self._building_bloom: Optional[BloomFilter] = None
 
-    async def get_server(self, guild: discord.Guild) -> Union[str, None]:
+    async def preload(self, *, warm_cache: bool, bloom_filter: bool) -> None:
+        """Stream the guild table once at startup.
+
+        With ``warm_cache`` every row is written to Redis, with
+        ``bloom_filter`` the ids of all rows build the bloom filter.
+        """
+        start = time.perf_counter()
+        if bloom_filter:
+            count = await self._bot.db.fetchval("SELECT count(*) FROM guild")
+            # Leave room for the guilds which customise settings while running
+            self._building_bloom = BloomFilter(max(count * 2, 10000))
+        query = "SELECT * FROM guild" if warm_cache else "SELECT id FROM guild"
+        if warm_cache:
+            sha = await self._bot.redis.script_load(WARMUP_HASH_SCRIPT)
+        rows = 0
+        async for batch in self._stream(query):
+            if self._building_bloom is not None:
+                for record in batch:
+                    self._building_bloom.add(record["id"])
+            if warm_cache:
+                pipe = self._bot.redis.pipeline()
+                for record in batch:
+                    fields = GuildSettings.from_record(record).to_hash()
+                    pipe.evalsha(
+                        sha,
+                        keys=[f"guild_{record['id']}"],
+                        args=[_warmup_ttl(), *itertools.chain(*fields.items())],
+                    )
+                await pipe.execute()
+            rows = self._log_progress("guild", rows, len(batch))
+        if self._building_bloom is not None:
+            self._bloom, self._building_bloom = self._building_bloom, None
+        log.info("Preloaded %d guild rows in %.2fs", rows, time.perf_counter() - start)
+
+    def _missed_invalidations(self) -> None:
+        super()._missed_invalidations()
+        # Guilds other shards added while nothing was received are not in the
+        # filter, so it can no longer rule guilds out
+        if self._bloom is not None or self._building_bloom is not None:
+            log.warning("Guild bloom filter disabled after missed invalidations")
+        self._bloom = self._building_bloom = None
+
+    def _evict(self, key: str) -> None:
+        super()._evict(key)
+        if not key.startswith("guild_"):
+            return
+        # Any write to a guild creates its row, so it has to pass the filter
+        gid = int(key[len("guild_") :])
+        for bloom in (self._bloom, self._building_bloom):
+            if bloom is not None:
+                bloom.add(gid)
+
+    async def get_settings(self, guild: discord.Guild) -> GuildSettings:
+        """Get every setting for a guild with at most one query and one hash."""
         gid = guild.id
-        key = f"server_{gid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            server = json.loads((await self._bot.redis.get(key)).decode("UTF-8"))
+        if self._bloom is not None and gid not in self._bloom:
+            return DEFAULT_GUILD_SETTINGS
+        key = f"guild_{gid}"
+        cached = self._local.get(key)
+        if cached is not MISSING:
+            return cached
+        data = await cache.get_hash(self._bot.redis, key)
+        if cache.NEGATIVE_FIELD in data:
+            settings = DEFAULT_GUILD_SETTINGS
+        elif data:
+            settings = GuildSettings.from_hash(data)
         else:
-            server = await self._bot.db.fetchval(
-                "SELECT server FROM guild WHERE id = $1", gid
+            record = await self._bot.db.fetchrow(
+                "SELECT * FROM guild WHERE id = $1", gid
             )
-        await self._bot.redis.set(key, json.dumps(server), expire=28800)
-        return server
+            settings = GuildSettings.from_record(record)
+            if record is None:
+                await cache.put_hash(
+                    self._bot.redis,
+                    key,
+                    {cache.NEGATIVE_FIELD: "1"},
+                    ttl=cache.NEGATIVE_TTL,
+                )
+            else:
+                await cache.put_hash(self._bot.redis, key, settings.to_hash())
+        self._local.set(key, settings)
+        return settings
+
+    async def update(self, guild: discord.Guild, field: str, value: Any) -> None:
+        """Set a single guild setting, one database and one Redis round trip."""
+        if field not in GuildSettings._fields:
+            raise ValueError(f"{field} is not a guild setting")
+        gid = guild.id
+        key = f"guild_{gid}"
+        if field == "news":
+            value = json.dumps(value)
+        record = await self._bot.db.fetchrow(_GUILD_UPSERT[field], gid, value)
+        settings = GuildSettings.from_record(record)
+        tr = self._bot.redis.multi_exec()
+        tr.delete(key)
+        tr.hmset_dict(key, settings.to_hash())
+        tr.expire(key, cache.DEFAULT_TTL)
+        self._invalidate(tr, key)
+        if field == "prefix" and value:
+            self._bot._prefix_cache.index.add(value)
+            tr.publish(PREFIX_CHANNEL, value)
+        await tr.execute()
+
+    async def get_server(self, guild: discord.Guild) -> Union[str, None]:
+        return (await self.get_settings(guild)).server
 
     async def set_server(
         self, guild: discord.Guild, server: Optional[str] = None
     ) -> None:
-        gid = guild.id
-        key = f"server_{gid}"
-        if await self._bot.db.fetch("SELECT server FROM guild WHERE id = $1", gid):
-            await self._bot.db.execute(
-                "UPDATE guild SET server = $1 WHERE id = $2",
-                server,
-                gid,
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO guild (id, server) VALUES ($1, $2)",
-                gid,
-                server,
-            )
-        await self._bot.redis.set(key, json.dumps(server), expire=28800)
+        await self.update(guild, "server", server)
 
     async def get_news(self, guild: discord.Guild) -> Union[Dict[str, str], None]:
-        gid = guild.id
-        key = f"news_{gid}"
-        redis = await self._bot.redis.exists(key)
-        if redis:
-            server = json.loads((await self._bot.redis.get(key)))
-        else:
-            server = json.loads(
-                await self._bot.db.fetchval("SELECT news FROM guild WHERE id = $1", gid)
-            )
-        await self._bot.redis.set(key, json.dumps(server), expire=28800)
-        return server
+        return (await self.get_settings(guild)).news
 
     async def set_news(self, guild: discord.Guild, news: Optional[str] = None) -> None:
-        gid = guild.id
-        str_news = json.dumps(news)
-        key = f"news_{gid}"
-        if await self._bot.db.fetch("SELECT news FROM guild WHERE id = $1", gid):
-            await self._bot.db.execute(
-                "UPDATE guild SET news = $1 WHERE id = $2",
-                str_news,
-                gid,
-            )
-        else:
-            await self._bot.db.execute(
-                "INSERT INTO guild (id, news) VALUES ($1, $2)",
-                gid,
-                str_news,
-            )
-        await self._bot.redis.set(key, str_news, expire=28800)
+        await self.update(guild, "news", news)
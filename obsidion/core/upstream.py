@@ -0,0 +1,334 @@
+"""HTTP client for the external APIs used by commands.
+
+Each upstream host can be given a profile with its own connection pool and
+timeouts, so one slow host cannot hold every connection. Idempotent
+requests are retried with jittered backoff and every host keeps a latency
+histogram. A circuit breaker per host rejects requests straight away while
+the host is failing, instead of every command waiting on its timeouts.
+Hosts with a rate limit share a token bucket in Redis across processes.
+"""
+import asyncio
+import bisect
+import logging
+import random
+import socket
+import time
+from collections import defaultdict
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Generator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import Type
+
+import aiohttp
+import aioredis
+from yarl import URL
+
+from .config import get_settings
+from .config import UpstreamUnavailable
+from .ratelimit import TokenBucket
+
+log = logging.getLogger("obsidion")
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+# Longest delay in seconds before the first retry, doubled for each one after
+RETRY_BACKOFF = 0.2
+
+
+class HostProfile(NamedTuple):
+    """Connection settings for requests to one or more hosts."""
+
+    limit: int = 20
+    connect_timeout: float = 5.0
+    read_timeout: float = 15.0
+    keepalive: float = 30.0
+    retries: int = 2
+    # Consecutive failed or slower than slow_call requests that open the circuit
+    failure_threshold: int = 5
+    slow_call: float = 5.0
+    # Seconds an open circuit waits before letting a probe request through
+    reset_timeout: float = 30.0
+    # Requests a second allowed across every process, None for no limit
+    rate: Optional[float] = None
+    burst: int = 1
+    max_wait: float = 2.0
+
+
+DEFAULT_PROFILE = HostProfile()
+
+PROFILES: Dict[str, HostProfile] = {
+    "api.ashcon.app": HostProfile(limit=30, connect_timeout=3.0, read_timeout=5.0),
+    "api.mojang.com": HostProfile(
+        limit=20, connect_timeout=3.0, read_timeout=5.0, rate=1.0, burst=60
+    ),
+    # Only the breaker and rate limit apply, asyncpixel uses its own session.
+    # Keys are limited to 120 requests a minute.
+    "api.hypixel.net": HostProfile(rate=2.0, burst=20),
+    "launchermeta.mojang.com": HostProfile(limit=5, read_timeout=10.0),
+    "bugs.mojang.com": HostProfile(limit=5, read_timeout=10.0),
+    "minecraft.fandom.com": HostProfile(limit=10, read_timeout=10.0),
+    "www.minecraft.net": HostProfile(limit=10, read_timeout=10.0),
+}
+
+
+class LatencyHistogram:
+    """Count request latencies in fixed buckets."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class HostStats:
+    """Request counters for a single host."""
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.retries = 0
+
+
+class CircuitBreaker:
+    """Fail fast while an upstream is failing.
+
+    The circuit opens after ``failure_threshold`` consecutive failures, then
+    rejects calls with ``UpstreamUnavailable``. After ``reset_timeout``
+    seconds it is half open and lets one probe through, which closes it
+    again on success or reopens it on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name: str, profile: HostProfile = DEFAULT_PROFILE) -> None:
+        self.name = name
+        self.profile = profile
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probe_started = 0.0
+
+    def before(self) -> None:
+        """Check a call may be made, raising if the circuit is open."""
+        if self.state == self.CLOSED:
+            return
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self._opened_at >= self.profile.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_started = now
+                return
+        # A probe that never reported back, e.g. it was cancelled, is
+        # replaced once it has had as long as an open circuit waits.
+        elif now - self._probe_started >= self.profile.reset_timeout:
+            self._probe_started = now
+            return
+        self.rejected += 1
+        raise UpstreamUnavailable(self.name)
+
+    def record(self, ok: bool, elapsed: float) -> None:
+        """Record the outcome of a call allowed by ``before``."""
+        if self.state == self.OPEN:
+            # Calls that started before the circuit opened, only the probe
+            # let through once it is half open can close it
+            return
+        if ok and elapsed <= self.profile.slow_call:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                log.info("Circuit for %s closed", self.name)
+                self.state = self.CLOSED
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (
+            self.state == self.CLOSED
+            and self.failures >= self.profile.failure_threshold
+        ):
+            if self.state == self.CLOSED:
+                self.trips += 1
+                log.warning("Circuit for %s opened", self.name)
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    async def call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        failures: Tuple[Type[BaseException], ...] = (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+        ),
+        **kwargs: Any,
+    ) -> Any:
+        """Await ``func``, counting the ``failures`` exceptions it raises."""
+        self.before()
+        start = time.monotonic()
+        try:
+            result = await func(*args, **kwargs)
+        except failures:
+            self.record(False, time.monotonic() - start)
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
+
+
+class _RequestContext:
+    """Lets a request be awaited or used as an async context manager."""
+
+    def __init__(self, coro: Awaitable[aiohttp.ClientResponse]) -> None:
+        self._coro = coro
+        self._resp: Optional[aiohttp.ClientResponse] = None
+
+    def __await__(self) -> Generator[Any, None, aiohttp.ClientResponse]:
+        return self._coro.__await__()
+
+    async def __aenter__(self) -> aiohttp.ClientResponse:
+        self._resp = await self._coro
+        return self._resp
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._resp.release()
+
+
+class UpstreamClient:
+    """Drop in replacement for the ``aiohttp.ClientSession`` methods cogs use.
+
+    Requests are sent through a session per profile, hosts without a profile
+    share the default one.
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        profiles: Optional[Dict[str, HostProfile]] = None,
+    ) -> None:
+        self.profiles = dict(PROFILES if profiles is None else profiles)
+        api_host = get_settings().API_URL.host
+        self.profiles.setdefault(api_host, HostProfile(limit=30, read_timeout=10.0))
+        self.stats: Dict[str, HostStats] = defaultdict(HostStats)
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.buckets: Dict[str, TokenBucket] = {
+            host: TokenBucket(
+                redis, host, profile.rate, profile.burst, profile.max_wait
+            )
+            for host, profile in self.profiles.items()
+            if profile.rate is not None
+        }
+        self._resolver = aiohttp.AsyncResolver()
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+    def _session(self, host: str) -> Tuple[aiohttp.ClientSession, HostProfile]:
+        name = host if host in self.profiles else "default"
+        profile = self.profiles.get(name, DEFAULT_PROFILE)
+        session = self._sessions.get(name)
+        if session is None:
+            # Use AF_INET as its socket family to prevent HTTPS related
+            # problems both locally and in production.
+            connector = aiohttp.TCPConnector(
+                resolver=self._resolver,
+                family=socket.AF_INET,
+                limit=profile.limit,
+                keepalive_timeout=profile.keepalive,
+            )
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=profile.connect_timeout, sock_read=profile.read_timeout
+            )
+            session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._sessions[name] = session
+        return session, profile
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        """Get the circuit breaker for ``host``."""
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            profile = self.profiles.get(host, DEFAULT_PROFILE)
+            breaker = self.breakers[host] = CircuitBreaker(host, profile)
+        return breaker
+
+    def request(self, method: str, url: str, **kwargs: Any) -> _RequestContext:
+        return _RequestContext(self._request(method.upper(), url, **kwargs))
+
+    def get(self, url: str, **kwargs: Any) -> _RequestContext:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> _RequestContext:
+        return self.request("POST", url, **kwargs)
+
+    async def _request(
+        self, method: str, url: str, **kwargs: Any
+    ) -> aiohttp.ClientResponse:
+        host = URL(url).host or ""
+        breaker = self.breaker(host)
+        breaker.before()
+        bucket = self.buckets.get(host)
+        if bucket is not None:
+            await bucket.acquire()
+        start = time.monotonic()
+        try:
+            resp = await self._send(host, method, url, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            breaker.record(False, time.monotonic() - start)
+            raise
+        breaker.record(resp.status < 500, time.monotonic() - start)
+        return resp
+
+    async def _send(
+        self, host: str, method: str, url: str, **kwargs: Any
+    ) -> aiohttp.ClientResponse:
+        session, profile = self._session(host)
+        stats = self.stats[host]
+        retries = profile.retries if method in IDEMPOTENT_METHODS else 0
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                resp = await session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                stats.errors += 1
+                if attempt == retries:
+                    raise
+                log.debug("Retrying %s %s", method, url, exc_info=True)
+            else:
+                stats.latency.observe(time.monotonic() - start)
+                if resp.status not in RETRY_STATUSES or attempt == retries:
+                    return resp
+                stats.errors += 1
+                resp.release()
+            attempt += 1
+            stats.retries += 1
+            # Full jitter keeps retries from many commands spread out
+            await asyncio.sleep(random.uniform(0, RETRY_BACKOFF * 2 ** (attempt - 1)))
+
+    async def close(self) -> None:
+        sessions: List[aiohttp.ClientSession] = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(session.close() for session in sessions))
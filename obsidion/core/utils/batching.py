@@ -0,0 +1,94 @@
+import asyncio
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import Hashable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class MicroBatcher(Generic[K, V]):
+    """Collect lookups made close together and resolve them in one call.
+
+    A batch is sent once it holds ``max_size`` keys or ``max_delay`` seconds
+    after its first key was submitted, whichever comes first. Submitting a
+    key that is already waiting or being resolved joins that lookup.
+
+    Parameters
+    ----------
+    func : Callable[[List[K]], Awaitable[Dict[K, V]]]
+        Resolves a batch of keys, keys missing from the result resolve
+        to ``None``.
+    max_size : int
+        The most keys sent in one call.
+    max_delay : float
+        How long in seconds the first key of a batch waits for others.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[List[K]], Awaitable[Dict[K, V]]],
+        *,
+        max_size: int = 10,
+        max_delay: float = 0.01,
+    ) -> None:
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.batches = 0
+        self.keys = 0
+        self._func = func
+        self._pending: Dict[K, "asyncio.Future[Optional[V]]"] = {}
+        self._in_flight: Dict[K, "asyncio.Future[Optional[V]]"] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set["asyncio.Future[None]"] = set()
+
+    async def submit(self, key: K) -> Optional[V]:
+        """Wait for ``key`` to be resolved as part of a batch."""
+        future = self._pending.get(key) or self._in_flight.get(key)
+        if future is None:
+            loop = asyncio.get_event_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_delay, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        self._in_flight.update(batch)
+        if batch:
+            task = asyncio.ensure_future(self._resolve(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: Dict[K, "asyncio.Future[Optional[V]]"]) -> None:
+        self.batches += 1
+        self.keys += len(batch)
+        try:
+            results = await self._func(list(batch))
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            for key in batch:
+                self._in_flight.pop(key, None)
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
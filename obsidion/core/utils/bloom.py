@@ -0,0 +1,40 @@
+import hashlib
+import math
+from typing import Iterator
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a bounded false positive rate.
+
+    Parameters
+    ----------
+    capacity : int
+        How many items the filter is sized for.
+    error_rate : float
+        The false positive rate once ``capacity`` items have been added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        capacity = max(capacity, 1)
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: int) -> Iterator[int]:
+        digest = hashlib.blake2b(
+            item.to_bytes(8, "little", signed=True), digest_size=16
+        ).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, item: int) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: int) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )